@@ -1,4 +1,7 @@
 import os
+import csv
+import io
+import tempfile
 import time
 from functools import wraps
 from telebot import types, TeleBot
@@ -7,6 +10,15 @@ from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from dotenv import load_dotenv
 import threading
+import bisect
+import heapq
+import html
+import json
+import math
+import signal
+from collections import Counter, OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 
 # Load environment variables
@@ -17,44 +29,511 @@ BOT_TOKEN = os.environ.get("BOT_TOKEN")
 SPREADSHEET_ID = os.environ.get("SPREADSHEET_ID")     # Google Sheet with Projects & Tasks tabs
 CREDENTIALS_FILE = os.environ.get("CREDENTIALS_FILE", "credentials.json")
 API_RATE_LIMIT = 60
+TASK_STATUSES = ["Not Done", "In Progress", "Done"]
+EXPORT_CHUNK_ROWS = 500  # rows fetched per Sheets read while streaming /export
+SCHEDULE_FILE = os.environ.get("SCHEDULE_FILE", "schedule.json")  # persisted reminders, digests and deferred jobs
+STALE_TASK_DAYS = int(os.environ.get("STALE_TASK_DAYS", "3"))     # remind about tasks "In Progress" this long
+INLINE_CACHE_SECONDS = 30   # how long Telegram may cache inline query answers
+INLINE_CACHE_SIZE = 256     # distinct inline queries kept in the local result cache
+INLINE_MAX_RESULTS = 50     # Telegram's limit per answer
+CONFIG_FILE = os.environ.get("CONFIG_FILE")  # optional JSON file used instead of the Config sheet tab
+CONFIG_REFRESH_SECONDS = int(os.environ.get("CONFIG_REFRESH_SECONDS", "30"))
+ROOT_FOLDER_ID = os.environ.get("ROOT_FOLDER_ID")  # Drive folder shown as the root of the Documents section
+PAGE_SIZE = 20              # Drive items per Documents page
+DRIVE_CACHE_SECONDS = 120   # how long a cached folder page is served before it is listed again
+DRIVE_CACHE_SIZE = 256      # folder pages kept in the listing cache
+TENANTS_FILE = os.environ.get("TENANTS_FILE")  # optional JSON file listing several teams served by this process
+API_QUOTA_PER_MINUTE = int(os.environ.get("API_QUOTA_PER_MINUTE", "240"))  # Google API requests per team per minute
+API_QUOTA_WAIT_SECONDS = 10  # how long a request waits for its team's quota before giving up
+
+# === Authorized Users & Assignees ===
+# Loaded from each team's "Config" tab (column A: authorized Telegram usernames without '@',
+# column B: assignee names) or from its config file, and refreshed in the background.
+# These are only the defaults used until the first successful load.
+DEFAULT_AUTHORIZED_USERNAMES = {"Denys_Sadovoi", "jmcn_ie", "username3"}  # REPLACE WITH ACTUAL USERNAMES
+DEFAULT_ASSIGNEES = ["Jonathan", "Stefan", "Denys", "Pierre", "Jimmy"]
+
+# Immutable snapshot that is replaced as a whole on reload, so readers never need a lock
+AccessConfig = namedtuple("AccessConfig", ["authorized_usernames", "assignees"])
+
+def make_access_config(usernames, assignees):
+    return AccessConfig(
+        frozenset(name.strip().lstrip("@") for name in usernames if name.strip()),
+        tuple(dict.fromkeys(name.strip() for name in assignees if name.strip()))
+    )
 
-# === Authorized Telegram Usernames ===
-# Add the Telegram usernames (without '@') who are allowed to use the bot
-AUTHORIZED_USERNAMES = {"Denys_Sadovoi", "jmcn_ie", "username3"}  # REPLACE WITH ACTUAL USERNAMES
-
-# === Available Assignees (for tasks and project assignee) ===
-available_assignees = ["Jonathan", "Stefan", "Denys", "Pierre", "Jimmy"]
+# === Tenants ===
+# Each team ("tenant") has its own spreadsheet, people, Drive root, caches and API quota.
+# All tenants share one Google API transport and one Telegram bot. Handlers run with the
+# tenant of the incoming update set as the current tenant (see require_auth); background
+# jobs set it explicitly with use_tenant().
+class QuotaExceeded(Exception):
+    pass
+
+class QuotaBucket:
+    """Token bucket limiting how many Google API requests one tenant makes per minute."""
+    __slots__ = ('per_minute', 'tokens', 'last_check', 'lock')
+
+    def __init__(self, per_minute):
+        self.per_minute = per_minute
+        self.tokens = per_minute
+        self.last_check = time.time()
+        self.lock = threading.Lock()
+
+    def acquire(self, timeout=API_QUOTA_WAIT_SECONDS):
+        deadline = time.time() + timeout
+        while True:
+            with self.lock:
+                now = time.time()
+                self.tokens = min(self.per_minute, self.tokens + (now - self.last_check) * self.per_minute / 60)
+                self.last_check = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) * 60 / self.per_minute
+            if now + wait > deadline:
+                raise QuotaExceeded("Your team's Google API quota is used up, please try again in a minute.")
+            time.sleep(wait)
+
+class Tenant:
+    """One team's settings plus every cache that must not be shared with other teams."""
+
+    def __init__(self, tenant_id, spreadsheet_id, usernames=(), assignees=(), chat_ids=(),
+                 root_folder_id=None, config_file=None, quota_per_minute=API_QUOTA_PER_MINUTE):
+        self.id = tenant_id
+        self.spreadsheet_id = spreadsheet_id
+        self.chat_ids = frozenset(chat_ids)  # group chats routed to this team regardless of who writes
+        self.root_folder_id = root_folder_id
+        self.config_file = config_file
+        self.config_tab_missing = False    # the spreadsheet has no Config tab; defaults stay in use
+        self.access_config = make_access_config(usernames, assignees)
+        self.quota = QuotaBucket(quota_per_minute)
+        self.snapshot_lock = threading.RLock()
+        self.snapshot = {'projects': {}, 'tasks': {}, 'synced_at': None, 'version': 0}  # projects by ID, tasks by sheet row number
+        self.task_counts = Counter()       # (task status, assignee, project priority) -> number of tasks
+        self.open_task_counts = Counter()  # project ID -> number of tasks not marked Done
+        self.inline_cache_lock = threading.Lock()
+        self.inline_cache = OrderedDict()  # normalized query -> (snapshot version, results), least recently used first
+        self.drive_cache_lock = threading.Lock()
+        self.folder_nodes = {}             # folder ID -> FolderNode, learned from listings so breadcrumbs need no API calls
+        self.folder_page_cache = OrderedDict()  # (folder ID, page token) -> (fetched at, listing), least recently used first
+        self.prefetching = set()           # page keys currently being fetched in the background
+        self.sheet_ids = {}                # sheet title -> numeric sheetId, needed for row deletion
+        self.active_chat_ids = set()       # chats that receive this team's notifications
+
+def load_tenants():
+    """Build the tenants from TENANTS_FILE, or a single default tenant from the environment."""
+    if not TENANTS_FILE:
+        return [Tenant("default", SPREADSHEET_ID, DEFAULT_AUTHORIZED_USERNAMES, DEFAULT_ASSIGNEES,
+                       root_folder_id=ROOT_FOLDER_ID, config_file=CONFIG_FILE)]
+    with open(TENANTS_FILE, encoding="utf-8") as f:
+        data = json.load(f)
+    return [
+        Tenant(entry["id"], entry["spreadsheet_id"],
+               entry.get("authorized_usernames", []), entry.get("assignees", []),
+               chat_ids=entry.get("chat_ids", []), root_folder_id=entry.get("root_folder_id"),
+               config_file=entry.get("config_file"),
+               quota_per_minute=entry.get("api_quota_per_minute", API_QUOTA_PER_MINUTE))
+        for entry in data["tenants"]
+    ]
+
+tenants = OrderedDict((tenant.id, tenant) for tenant in load_tenants())  # tenant ID -> Tenant, first is the default
+default_tenant = next(iter(tenants.values()))
+tenant_context = threading.local()
+
+# Immutable lookup tables replaced as a whole whenever a tenant's usernames change
+TenantIndex = namedtuple("TenantIndex", ["by_chat", "by_username"])
+tenant_index = TenantIndex({}, {})
+
+def rebuild_tenant_index():
+    global tenant_index
+    by_chat, by_username = {}, {}
+    for tenant in tenants.values():
+        for chat_id in tenant.chat_ids:
+            by_chat.setdefault(chat_id, tenant)
+        for username in tenant.access_config.authorized_usernames:
+            by_username.setdefault(username, tenant)  # a user listed by several teams gets the first one
+    tenant_index = TenantIndex(by_chat, by_username)
+
+rebuild_tenant_index()
+
+def resolve_tenant(chat_id, username):
+    """The tenant serving an update: a chat routed to a team wins over the sender's own team."""
+    index = tenant_index
+    return index.by_chat.get(chat_id) or index.by_username.get(username)
+
+def current_tenant():
+    return getattr(tenant_context, 'tenant', None) or default_tenant
+
+@contextmanager
+def use_tenant(tenant):
+    previous = getattr(tenant_context, 'tenant', None)
+    tenant_context.tenant = tenant
+    try:
+        yield tenant
+    finally:
+        tenant_context.tenant = previous
+
+class QuotaProxy:
+    """Wraps a shared Google API client so each request's execute() is charged to the current tenant."""
+    __slots__ = ('target',)
+
+    def __init__(self, target):
+        self.target = target
+
+    def __getattr__(self, name):
+        attr = getattr(self.target, name)
+        if name == 'execute':
+            def execute(*args, **kwargs):
+                current_tenant().quota.acquire()
+                return attr(*args, **kwargs)
+            return execute
+        if callable(attr):
+            # Resource and request builders: keep wrapping until execute() is reached
+            return lambda *args, **kwargs: QuotaProxy(attr(*args, **kwargs))
+        return attr
 
 # === Initialize Google Services and Bot ===
 scopes = [
-    "https://www.googleapis.com/auth/spreadsheets"
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive.readonly"
 ]
 creds = service_account.Credentials.from_service_account_file(CREDENTIALS_FILE, scopes=scopes)
-sheets_service = build('sheets', 'v4', credentials=creds)
+sheets_service = QuotaProxy(build('sheets', 'v4', credentials=creds))
+drive_service = QuotaProxy(build('drive', 'v3', credentials=creds))
 bot = TeleBot(BOT_TOKEN)
 
+# === Access Config Loading ===
+config_thread = None
+
+def set_access_config(usernames, assignees):
+    """Swap in a new config for the current tenant; returns True if it differs from the current one."""
+    tenant = current_tenant()
+    new_config = make_access_config(usernames, assignees)
+    changed = new_config != tenant.access_config
+    tenant.access_config = new_config
+    if changed:
+        rebuild_tenant_index()
+    return changed
+
+def read_access_config():
+    """Return (usernames, assignees) from the tenant's config file if set, otherwise from its Config tab."""
+    tenant = current_tenant()
+    if tenant.config_file:
+        with open(tenant.config_file, encoding="utf-8") as f:
+            data = json.load(f)
+        return data.get("authorized_usernames", []), data.get("assignees", [])
+    try:
+        result = sheets_service.spreadsheets().values().get(
+            spreadsheetId=tenant.spreadsheet_id,
+            range="Config!A2:B"
+        ).execute()
+    except HttpError as e:
+        if e.resp.status != 400:
+            raise
+        # Sheets answers 400 "Unable to parse range" when the tab does not exist: not configured
+        if not tenant.config_tab_missing:
+            print(f"No Config tab for {tenant.id}, keeping the configured users and assignees")
+            tenant.config_tab_missing = True
+        return [], []
+    tenant.config_tab_missing = False
+    rows = result.get("values", [])
+    usernames = [row[0] for row in rows if len(row) > 0]
+    assignees = [row[1] for row in rows if len(row) > 1]
+    return usernames, assignees
+
+def reload_access_config():
+    tenant = current_tenant()
+    usernames, assignees = read_access_config()
+    # An empty column is treated as "not configured" so a bad edit cannot lock everyone out
+    usernames = usernames or tenant.access_config.authorized_usernames
+    assignees = assignees or tenant.access_config.assignees
+    if set_access_config(usernames, assignees):
+        print(f"Access config updated for {tenant.id}: {len(tenant.access_config.authorized_usernames)} users, "
+              f"{len(tenant.access_config.assignees)} assignees")
+
+def reload_all_access_configs():
+    for tenant in tenants.values():
+        with use_tenant(tenant):
+            try:
+                reload_access_config()
+            except Exception as e:
+                print(f"Error reloading access config for {tenant.id}: {str(e)}")
+
+def start_config_refresher():
+    """Load every tenant's access config now and keep reloading them in a background thread."""
+    def config_worker():
+        while True:
+            time.sleep(CONFIG_REFRESH_SECONDS)
+            reload_all_access_configs()
+
+    reload_all_access_configs()
+    global config_thread
+    if config_thread is None or not config_thread.is_alive():
+        config_thread = threading.Thread(target=config_worker, daemon=True)
+        config_thread.start()
+        print("Config refresher started.")
+
+# === Session Store ===
+SESSION_IDLE_TTL = 30 * 60    # abandoned flows are cancelled after this many idle seconds
+SESSION_MAX_ENTRIES = 10000   # hard cap on tracked chats; least recently used are evicted first
+RATE_IDLE_TTL = 5 * 60        # a bucket idle this long has refilled completely, so dropping it loses nothing
+SESSION_SWEEP_SECONDS = 60
+
+class SessionStore:
+    """Thread-safe map of chat/user ID -> record, split over independently locked shards.
+
+    Each shard keeps its entries in least-recently-used order, so idle eviction only
+    looks at the oldest entries and the size cap drops the least recently used one.
+    """
+
+    def __init__(self, factory, ttl, max_entries, shards=16, on_evict=None):
+        self.factory = factory
+        self.ttl = ttl
+        self.shard_cap = max(1, max_entries // shards)
+        self.on_evict = on_evict
+        self.shards = [(threading.RLock(), OrderedDict()) for _ in range(shards)]
+
+    def shard(self, key):
+        return self.shards[hash(key) % len(self.shards)]
+
+    def lock(self, key):
+        """The shard lock guarding `key`; hold it for read-modify-write on that entry."""
+        return self.shard(key)[0]
+
+    def peek(self, key):
+        """Return the entry without marking it as used (for handler filters)."""
+        lock, entries = self.shard(key)
+        with lock:
+            return entries.get(key)
+
+    def get(self, key):
+        lock, entries = self.shard(key)
+        with lock:
+            entry = entries.get(key)
+            if entry is not None:
+                entry.last_seen = time.time()
+                entries.move_to_end(key)
+            return entry
+
+    def get_or_create(self, key):
+        lock, entries = self.shard(key)
+        evicted = []
+        with lock:
+            entry = entries.get(key)
+            if entry is None:
+                entry = entries[key] = self.factory(key)
+                while len(entries) > self.shard_cap:
+                    evicted.append(entries.popitem(last=False)[1])
+            else:
+                entries.move_to_end(key)
+            entry.last_seen = time.time()
+        self.notify_evicted(evicted)
+        return entry
+
+    def pop(self, key):
+        lock, entries = self.shard(key)
+        with lock:
+            return entries.pop(key, None)
+
+    def evict_idle(self):
+        cutoff = time.time() - self.ttl
+        evicted = []
+        for lock, entries in self.shards:
+            with lock:
+                while entries:
+                    key, entry = next(iter(entries.items()))
+                    if entry.last_seen > cutoff:
+                        break
+                    del entries[key]
+                    evicted.append(entry)
+        self.notify_evicted(evicted)
+        return len(evicted)
+
+    def notify_evicted(self, evicted):
+        # Runs outside the shard locks so callbacks may send messages or touch the store
+        if self.on_evict:
+            for entry in evicted:
+                try:
+                    self.on_evict(entry)
+                except Exception as e:
+                    print(f"Error in session eviction callback: {e}")
+
+    def __contains__(self, key):
+        return self.peek(key) is not None
+
+    def __len__(self):
+        return sum(len(entries) for _, entries in self.shards)
+
+class Session:
+    """Per-chat state: the current section, the active flow and the live view message."""
+    __slots__ = ('chat_id', 'section', 'action', 'step', 'flow', 'flow_tenant_id', 'browse',
+                 'live_message_id', 'live_has_markup', 'live_buried', 'last_seen')
+
+    def __init__(self, chat_id):
+        self.chat_id = chat_id
+        self.section = None
+        self.action = None       # name of the active multi-step flow, e.g. 'add_task'
+        self.step = None         # step within that flow, e.g. 'description'
+        self.flow = None         # the flow's record (TaskFlow, ProjectFlow, ...)
+        self.flow_tenant_id = None  # tenant that started the flow; only its updates may continue it
+        self.browse = None       # FolderBrowse position in the Documents section
+        self.live_message_id = None
+        self.live_has_markup = False
+        self.live_buried = False
+        self.last_seen = time.time()
+
+    def start_flow(self, action, flow, step=None):
+        self.action = action
+        self.flow = flow
+        self.step = step
+        self.flow_tenant_id = current_tenant().id
+
+    def end_flow(self):
+        flow = self.flow
+        self.action = self.step = self.flow = self.flow_tenant_id = None
+        return flow
+
+class TaskFlow:
+    """Fields collected by the add-task and edit-task flows."""
+    __slots__ = ('project_id', 'row', 'original_desc', 'desc', 'status', 'assignees', 'notes')
+
+    def __init__(self, project_id, row=None, original_desc=None):
+        self.project_id = project_id
+        self.row = row
+        self.original_desc = original_desc  # description the edited row had when the flow started
+        self.desc = None
+        self.status = None
+        self.assignees = []
+        self.notes = ""
+
+class ProjectFlow:
+    """Project-level flows (field edits, bulk import) only need the project."""
+    __slots__ = ('project_id',)
+
+    def __init__(self, project_id):
+        self.project_id = project_id
+
+class BulkEditFlow:
+    __slots__ = ('project_id', 'tasks', 'selected')
+
+    def __init__(self, project_id, tasks):
+        self.project_id = project_id
+        self.tasks = tasks      # sheet row number -> task row
+        self.selected = []
+
+class FolderBrowse:
+    """Where a chat is in the Documents section; page_tokens[i] is the Drive token for page i."""
+    __slots__ = ('folder_id', 'page_tokens', 'page_index', 'tenant_id')
+
+    def __init__(self, folder_id):
+        self.folder_id = folder_id
+        self.tenant_id = current_tenant().id
+        self.page_tokens = [None]
+        self.page_index = 0
+
+class RateBucket:
+    __slots__ = ('tokens', 'last_check', 'last_seen')
+
+    def __init__(self, user_id):
+        self.tokens = API_RATE_LIMIT
+        self.last_check = self.last_seen = time.time()
+
+FLOW_NAMES = {
+    'add_task': "task addition",
+    'edit_task': "task edit",
+    'bulk_import': "bulk import",
+    'bulk_edit': "bulk edit",
+    'edit_project_notes': "project notes edit",
+    'edit_project_priority': "project priority change",
+    'edit_project_status': "project status change",
+    'edit_project_assignee': "project assignee change",
+}
+
+def cancel_evicted_session(session):
+    """Tell the user their half-finished flow was dropped and remove its stale buttons."""
+    if not session.action:
+        return
+    if session.live_message_id and session.live_has_markup:
+        try:
+            bot.edit_message_reply_markup(chat_id=session.chat_id, message_id=session.live_message_id, reply_markup=None)
+        except Exception:
+            pass
+    flow_name = FLOW_NAMES.get(session.action, "action")
+    bot.send_message(session.chat_id, f"⌛ Your unfinished {flow_name} was cancelled after a period of inactivity.")
+
+def get_update_origin(message_or_call):
+    """Return (user, chat_id) for a Message, CallbackQuery or InlineQuery; chat_id is None for inline queries."""
+    if isinstance(message_or_call, types.Message):
+        return message_or_call.from_user, message_or_call.chat.id
+    if isinstance(message_or_call, types.CallbackQuery):
+        return message_or_call.from_user, message_or_call.message.chat.id
+    if isinstance(message_or_call, types.InlineQuery):
+        return message_or_call.from_user, None
+    return None, None
+
+def in_flow(message_or_call, action, step=None):
+    """Handler filter: is this chat in `action` (and at `step`, if given) for the update's tenant?
+
+    A flow started by one team is invisible to another team's members in the same chat.
+    """
+    user, chat_id = get_update_origin(message_or_call)
+    session = user_states.peek(chat_id)
+    if session is None or session.action != action or (step is not None and session.step != step):
+        return False
+    tenant = resolve_tenant(chat_id, user.username) if user and user.username else None
+    return tenant is not None and tenant.id == session.flow_tenant_id
+
+def take_flow(chat_id, action):
+    """Atomically end the chat's `action` flow and return its record, or None if it is not active.
+
+    Finalizers use this so a double-tapped button cannot submit the same flow twice,
+    and a flow started by another tenant cannot be finished here.
+    """
+    with user_states.lock(chat_id):
+        session = user_states.peek(chat_id)
+        if session is None or session.action != action or session.flow_tenant_id != current_tenant().id:
+            return None
+        return session.end_flow()
+
+def start_session_janitor():
+    """Periodically evict idle sessions and rate buckets."""
+    def janitor_worker():
+        while True:
+            time.sleep(SESSION_SWEEP_SECONDS)
+            try:
+                sessions_evicted = user_states.evict_idle()
+                rates_evicted = user_rates.evict_idle()
+                if sessions_evicted or rates_evicted:
+                    print(f"Evicted {sessions_evicted} idle sessions and {rates_evicted} rate buckets")
+            except Exception as e:
+                print(f"Error evicting sessions: {str(e)}")
+
+    threading.Thread(target=janitor_worker, daemon=True).start()
+    print("Session janitor started.")
+
 # === Global State Data ===
-user_rates = {}
-user_states = {}
+user_rates = SessionStore(RateBucket, RATE_IDLE_TTL, SESSION_MAX_ENTRIES)
+user_states = SessionStore(Session, SESSION_IDLE_TTL, SESSION_MAX_ENTRIES, on_evict=cancel_evicted_session)
 user_auth = {}  # Store user credentials and tokens
-notification_queue = []
+notification_queue = []  # (tenant ID, message) pairs
 notification_thread = None
-active_chat_ids = set() # Keep track of active authorized chat IDs
 
 # === Utility Decorators ===
 def rate_limit(func):
     @wraps(func)
     def wrapper(message):
         user_id = message.from_user.id
-        now = time.time()
-        if user_id not in user_rates:
-            user_rates[user_id] = {'tokens': API_RATE_LIMIT, 'last_check': now}
-        elapsed = now - user_rates[user_id]['last_check']
-        user_rates[user_id]['tokens'] = min(API_RATE_LIMIT,
-                                            user_rates[user_id]['tokens'] + elapsed * (API_RATE_LIMIT / 60))
-        user_rates[user_id]['last_check'] = now
-        if user_rates[user_id]['tokens'] >= 1:
-            user_rates[user_id]['tokens'] -= 1
+        bucket = user_rates.get_or_create(user_id)
+        with user_rates.lock(user_id):
+            now = time.time()
+            elapsed = now - bucket.last_check
+            bucket.tokens = min(API_RATE_LIMIT, bucket.tokens + elapsed * (API_RATE_LIMIT / 60))
+            bucket.last_check = now
+            allowed = bucket.tokens >= 1
+            if allowed:
+                bucket.tokens -= 1
+        if allowed:
             return func(message)
         else:
             bot.send_message(message.chat.id, "⏳ Please wait a moment before making another request.")
@@ -67,6 +546,8 @@ def handle_errors(func):
             return func(*args, **kwargs)
         except HttpError as e:
             msg = f"🚨 API Error: {e.error_details[0]['message']}" if e.error_details else "🚨 API Error occurred."
+        except QuotaExceeded as e:
+            msg = f"⏳ {e}"
         except Exception as e:
             msg = f"⚠️ Unexpected error: {str(e)}"
         if args and isinstance(args[0], types.CallbackQuery):
@@ -80,19 +561,13 @@ def handle_errors(func):
 def require_auth(func):
     @wraps(func)
     def wrapper(message_or_call):
-        user = None
-        chat_id = None
-        # Check if it's a Message or CallbackQuery
-        if isinstance(message_or_call, types.Message):
-            user = message_or_call.from_user
-            chat_id = message_or_call.chat.id
-        elif isinstance(message_or_call, types.CallbackQuery):
-            user = message_or_call.from_user
-            chat_id = message_or_call.message.chat.id
-        
-        if user and user.username and user.username in AUTHORIZED_USERNAMES:
-            # User is authorized, proceed with the function
-            return func(message_or_call)
+        user, chat_id = get_update_origin(message_or_call)
+        tenant = resolve_tenant(chat_id, user.username) if user and user.username else None
+        if tenant and user.username in tenant.access_config.authorized_usernames:
+            # User is authorized, proceed with the function as the chat's tenant
+            with use_tenant(tenant):
+                note_user_activity(message_or_call)
+                return func(message_or_call)
         else:
             # User is not authorized
             username_str = f" (@{user.username})" if user and user.username else ""
@@ -111,70 +586,481 @@ def require_auth(func):
                     bot.answer_callback_query(message_or_call.id, "Unauthorized Access")
                 except Exception as e:
                     print(f"Error answering callback query: {e}")
+            elif isinstance(message_or_call, types.InlineQuery):
+                try:
+                    bot.answer_inline_query(message_or_call.id, [], cache_time=INLINE_CACHE_SECONDS, is_personal=True)
+                except Exception as e:
+                    print(f"Error answering inline query: {e}")
             return None # Stop execution
     return wrapper
 
 # === Menus ===
+MENU_LABELS = {"Project Tracking", "Documents", "Project Status", "Back to Main"}
+
+def is_menu_or_command(text):
+    """Reply-keyboard taps and /commands must reach their own handlers, not a free-text flow."""
+    text = (text or "").strip()
+    return text in MENU_LABELS or text.startswith("/")
+
 def get_initial_menu():
     menu = types.ReplyKeyboardMarkup(resize_keyboard=True)
-    menu.row("Project Tracking")
+    menu.row("Project Tracking", "Documents")
     return menu
 
 def get_project_tracking_menu():
     menu = types.ReplyKeyboardMarkup(resize_keyboard=True)
-    menu.row("Project Status")
+    menu.row("Project Status", "Documents")
     return menu
 
+def get_document_menu():
+    menu = types.ReplyKeyboardMarkup(resize_keyboard=True)
+    menu.row("Documents", "Back to Main")
+    return menu
+
+# === Live View Manager ===
+# Each chat has one "live" bot message that navigation edits in place. A new message is
+# only sent when the live one is buried under a user message or can no longer be edited.
+def note_user_activity(message_or_call):
+    if isinstance(message_or_call, types.CallbackQuery) and message_or_call.message:
+        # The message whose button was pressed becomes the live one
+        session = user_states.get_or_create(message_or_call.message.chat.id)
+        session.live_message_id = message_or_call.message.message_id
+        session.live_has_markup = True
+        session.live_buried = False
+    elif isinstance(message_or_call, types.Message):
+        user_states.get_or_create(message_or_call.chat.id).live_buried = True
+
+def bury_live_message(chat_id):
+    """Mark the live message as no longer at the bottom of the chat."""
+    session = user_states.peek(chat_id)
+    if session:
+        session.live_buried = True
+
+def show_view(chat_id, text, reply_markup=None, parse_mode=None):
+    """Render a screen in the chat's live message, sending a new one only when needed."""
+    session = user_states.get_or_create(chat_id)
+    if session.live_message_id and not session.live_buried:
+        try:
+            bot.edit_message_text(text, chat_id=chat_id, message_id=session.live_message_id,
+                                  parse_mode=parse_mode, reply_markup=reply_markup)
+            session.live_has_markup = reply_markup is not None
+            return session.live_message_id
+        except Exception as e:
+            if "message is not modified" in str(e):
+                return session.live_message_id
+            print(f"Could not edit live message in chat {chat_id}, sending a new one: {e}")
+    if session.live_message_id and session.live_has_markup:
+        # Strip the old keyboard so the chat does not accumulate stale buttons
+        try:
+            bot.edit_message_reply_markup(chat_id=chat_id, message_id=session.live_message_id, reply_markup=None)
+        except Exception:
+            pass
+    sent = bot.send_message(chat_id, text, parse_mode=parse_mode, reply_markup=reply_markup)
+    session.live_message_id = sent.message_id
+    session.live_has_markup = reply_markup is not None
+    session.live_buried = False
+    return sent.message_id
+
+# === Project Snapshot & Aggregates ===
+# The snapshot, its lock and the counters live on the current Tenant.
+SNAPSHOT_REFRESH_SECONDS = 300
+snapshot_thread = None
+
+def normalize_priority(value):
+    value = (value or "").strip().title()
+    return value if value in ("High", "Medium", "Low") else "Unset"
+
+def get_task_assignees(task):
+    names = [name.strip() for name in task[3].split(",")] if len(task) > 3 else []
+    return [name for name in names if name] or ["Unassigned"]
+
+def get_task_status(task):
+    return task[2].strip() if len(task) > 2 and task[2].strip() else "Not set"
+
+def apply_task_to_counts(task, sign):
+    """Add (sign=1) or remove (sign=-1) a task row's contribution to the counters."""
+    if not task or not task[0]:
+        return
+    tenant = current_tenant()
+    task_counts, open_task_counts = tenant.task_counts, tenant.open_task_counts
+    project = tenant.snapshot['projects'].get(task[0])
+    priority = normalize_priority(project[3] if project and len(project) > 3 else "")
+    status = get_task_status(task)
+    for assignee in get_task_assignees(task):
+        key = (status, assignee, priority)
+        task_counts[key] += sign
+        if task_counts[key] <= 0:
+            del task_counts[key]
+    if status != "Done":
+        open_task_counts[task[0]] += sign
+        if open_task_counts[task[0]] <= 0:
+            del open_task_counts[task[0]]
+
+def rebuild_counts():
+    tenant = current_tenant()
+    with tenant.snapshot_lock:
+        tenant.task_counts.clear()
+        tenant.open_task_counts.clear()
+        for task in tenant.snapshot['tasks'].values():
+            apply_task_to_counts(task, 1)
+
+def sync_snapshot():
+    """Reload Projects and Tasks in one batchGet and rebuild the counters from the result."""
+    tenant = current_tenant()
+    snapshot = tenant.snapshot
+    result = sheets_service.spreadsheets().values().batchGet(
+        spreadsheetId=tenant.spreadsheet_id,
+        ranges=["Projects!A2:F1000", "Tasks!A2:E1000"]
+    ).execute()
+    value_ranges = result.get("valueRanges", [])
+    project_rows = value_ranges[0].get("values", []) if len(value_ranges) > 0 else []
+    task_rows = value_ranges[1].get("values", []) if len(value_ranges) > 1 else []
+    projects = {row[0]: row for row in project_rows if row and row[0]}
+    tasks = {row_num: row for row_num, row in enumerate(task_rows, start=2) if row and row[0]}
+    with tenant.snapshot_lock:
+        snapshot['projects'] = projects
+        snapshot['tasks'] = tasks
+        snapshot['synced_at'] = datetime.now()
+        snapshot['version'] += 1
+        rebuild_counts()
+    for task in tasks.values():
+        if get_task_status(task) == "In Progress":
+            schedule_stale_check(task)
+    print(f"Snapshot synced for {tenant.id}: {len(projects)} projects, {len(tasks)} tasks")
+
+def sync_all_snapshots():
+    for tenant in tenants.values():
+        with use_tenant(tenant):
+            try:
+                sync_snapshot()
+            except Exception as e:
+                print(f"Error syncing snapshot for {tenant.id}: {str(e)}")
+
+def get_row_from_range(updated_range):
+    """Extract the first row number from an A1 range such as 'Tasks!A12:E12'."""
+    if not updated_range:
+        return None
+    cell = updated_range.split("!")[-1].split(":")[0]
+    digits = "".join(ch for ch in cell if ch.isdigit())
+    return int(digits) if digits else None
+
+def get_task_identity(task):
+    """(project ID, description): what a Tasks row must still hold before we overwrite it by row number."""
+    task = list(task) + ["", ""]
+    return task[0], task[1]
+
+def read_task_rows(row_numbers):
+    """Fetch the current contents of the given Tasks rows in one batchGet -> {row number: row}."""
+    result = sheets_service.spreadsheets().values().batchGet(
+        spreadsheetId=current_tenant().spreadsheet_id,
+        ranges=[f"Tasks!A{row_num}:E{row_num}" for row_num in row_numbers]
+    ).execute()
+    value_ranges = result.get("valueRanges", [])
+    return {row_num: (value_range.get("values") or [[]])[0]
+            for row_num, value_range in zip(row_numbers, value_ranges)}
+
+def find_task_row(project_id, desc, preferred_row=None):
+    """Locate a task by project and description after other chats may have shifted rows.
+
+    Returns the preferred row if it still holds the task, otherwise the only other row
+    that does, or None if the task is gone or ambiguous.
+    """
+    identity = (project_id, desc)
+    if preferred_row and get_task_identity(read_task_rows([preferred_row])[preferred_row]) == identity:
+        return preferred_row
+    result = sheets_service.spreadsheets().values().get(
+        spreadsheetId=current_tenant().spreadsheet_id,
+        range="Tasks!A2:B1000"
+    ).execute()
+    matches = [row_num for row_num, row in enumerate(result.get("values", []), start=2)
+               if get_task_identity(row) == identity]
+    return matches[0] if len(matches) == 1 else None
+
+def record_task_write(row_number, task):
+    """Apply a single Tasks row write to the snapshot and counters."""
+    if not row_number:
+        return
+    tenant = current_tenant()
+    snapshot = tenant.snapshot
+    with tenant.snapshot_lock:
+        old_task = snapshot['tasks'].get(row_number)
+        if old_task:
+            apply_task_to_counts(old_task, -1)
+        snapshot['tasks'][row_number] = task
+        snapshot['version'] += 1
+        apply_task_to_counts(task, 1)
+    if get_task_status(task) == "In Progress" and (not old_task or get_task_status(old_task) != "In Progress"):
+        schedule_stale_check(task, replace=True)
+
+def record_task_deletes(row_numbers):
+    """Drop deleted Tasks rows from the snapshot and shift the rows below them up."""
+    deleted = sorted(set(row_numbers))
+    tenant = current_tenant()
+    snapshot = tenant.snapshot
+    with tenant.snapshot_lock:
+        shifted = {}
+        for row_number, task in snapshot['tasks'].items():
+            if row_number in deleted:
+                apply_task_to_counts(task, -1)
+                continue
+            shifted[row_number - bisect.bisect_left(deleted, row_number)] = task
+        snapshot['tasks'] = shifted
+        snapshot['version'] += 1
+
+def record_project_field(project_id, col_letter, new_value):
+    """Apply a single Projects cell write to the snapshot; priority changes move the project's task counts."""
+    tenant = current_tenant()
+    snapshot = tenant.snapshot
+    with tenant.snapshot_lock:
+        project = snapshot['projects'].get(project_id)
+        if project is None:
+            return
+        col_idx = ord(col_letter.upper()) - ord("A")
+        project_tasks = [task for task in snapshot['tasks'].values() if task[0] == project_id] if col_idx == 3 else []
+        for task in project_tasks:
+            apply_task_to_counts(task, -1)
+        project.extend([""] * (col_idx + 1 - len(project)))
+        project[col_idx] = new_value
+        snapshot['version'] += 1
+        for task in project_tasks:
+            apply_task_to_counts(task, 1)
+
+def build_summary_text():
+    tenant = current_tenant()
+    snapshot = tenant.snapshot
+    with tenant.snapshot_lock:
+        if snapshot['synced_at'] is None:
+            return "Summary not available yet, please try again in a moment."
+        by_assignee = {}
+        for (status, assignee, _), count in tenant.task_counts.items():
+            by_assignee.setdefault(assignee, Counter())[status] += count
+        high_projects = []
+        for pid, count in tenant.open_task_counts.items():
+            project = snapshot['projects'].get(pid)
+            if project and len(project) > 3 and normalize_priority(project[3]) == "High":
+                high_projects.append((project[1] if len(project) > 1 else f"Project ID {pid}", count))
+        synced_at = snapshot['synced_at']
+
+    # Rendered as HTML: names and statuses come from the sheet and may contain Markdown characters
+    msg = "<b>Task Summary</b>\n\n<b>Tasks per assignee:</b>\n"
+    if by_assignee:
+        for assignee in sorted(by_assignee):
+            counts = by_assignee[assignee]
+            parts = [f"{status}: {counts[status]}" for status in ("Not Done", "In Progress", "Done") if counts[status]]
+            parts += [f"{html.escape(status)}: {count}" for status, count in counts.items() if status not in ("Not Done", "In Progress", "Done")]
+            msg += f"• {html.escape(assignee)} — {', '.join(parts)}\n"
+    else:
+        msg += "No tasks found.\n"
+    msg += "\n<b>High-priority projects with open tasks:</b>\n"
+    if high_projects:
+        for name, count in sorted(high_projects, key=lambda item: -item[1]):
+            msg += f"• 🔴 {html.escape(name)} ({count} open)\n"
+    else:
+        msg += "None.\n"
+    msg += f"\n<i>Synced {synced_at.strftime('%H:%M')}</i>"
+    return msg
+
+def build_assignee_summary_text(assignee):
+    tenant = current_tenant()
+    with tenant.snapshot_lock:
+        if tenant.snapshot['synced_at'] is None:
+            return "Summary not available yet, please try again in a moment."
+        by_status = Counter()
+        by_priority = Counter()
+        for (status, name, priority), count in tenant.task_counts.items():
+            if name == assignee:
+                by_status[status] += count
+                if status != "Done":
+                    by_priority[priority] += count
+    if not by_status:
+        return f"<b>Tasks for {html.escape(assignee)}:</b>\nNo tasks assigned."
+    msg = f"<b>Tasks for {html.escape(assignee)}:</b>\n"
+    msg += "\n".join(f"• {html.escape(status)}: {count}" for status, count in sorted(by_status.items()))
+    if by_priority:
+        msg += "\n\n<b>Open tasks by project priority:</b>\n"
+        msg += "\n".join(f"• {priority}: {by_priority[priority]}" for priority in ("High", "Medium", "Low", "Unset") if by_priority[priority])
+    return msg
+
+def start_snapshot_service():
+    """Sync every tenant's snapshot now and keep refreshing them in a background thread."""
+    def snapshot_worker():
+        while True:
+            time.sleep(SNAPSHOT_REFRESH_SECONDS)
+            sync_all_snapshots()
+
+    sync_all_snapshots()
+    global snapshot_thread
+    if snapshot_thread is None or not snapshot_thread.is_alive():
+        snapshot_thread = threading.Thread(target=snapshot_worker, daemon=True)
+        snapshot_thread.start()
+        print("Snapshot service started.")
+
 # === Google Drive Helpers (Document Hub) ===
-def get_folder_contents(folder_id, page_token=None):
-    return drive_service.files().list(
+# Folder nodes and cached pages live on the current Tenant, so one team can only browse
+# folders it has reached from its own root.
+FOLDER_MIME_TYPE = "application/vnd.google-apps.folder"
+FolderNode = namedtuple("FolderNode", ["name", "parent_id"])
+prefetch_executor = ThreadPoolExecutor(max_workers=2)
+
+def fetch_folder_page(folder_id, page_token=None):
+    result = drive_service.files().list(
         q=f"'{folder_id}' in parents and trashed=false",
-        fields="files(id, name, mimeType, modifiedTime), nextPageToken",
+        fields="files(id, name, mimeType, webViewLink), nextPageToken",
+        orderBy="folder,name",
         pageSize=PAGE_SIZE,
         pageToken=page_token,
         supportsAllDrives=True,
         includeItemsFromAllDrives=True
     ).execute()
+    # Every listing teaches us the parent of each subfolder
+    folder_nodes = current_tenant().folder_nodes
+    for item in result.get('files', []):
+        if item['mimeType'] == FOLDER_MIME_TYPE:
+            folder_nodes[item['id']] = FolderNode(item['name'], folder_id)
+    return result
+
+def get_folder_contents(folder_id, page_token=None):
+    """Return one page of a folder listing, served from the LRU cache while it is fresh."""
+    tenant = current_tenant()
+    folder_page_cache = tenant.folder_page_cache
+    key = (folder_id, page_token)
+    with tenant.drive_cache_lock:
+        cached = folder_page_cache.get(key)
+        if cached and time.time() - cached[0] < DRIVE_CACHE_SECONDS:
+            folder_page_cache.move_to_end(key)
+            return cached[1]
+    result = fetch_folder_page(folder_id, page_token)
+    with tenant.drive_cache_lock:
+        folder_page_cache[key] = (time.time(), result)
+        folder_page_cache.move_to_end(key)
+        while len(folder_page_cache) > DRIVE_CACHE_SIZE:
+            folder_page_cache.popitem(last=False)
+    return result
+
+def prefetch_folder_page(folder_id, page_token):
+    """Warm the cache with the next page in the background so "Next" is instant."""
+    tenant = current_tenant()
+    key = (folder_id, page_token)
+    with tenant.drive_cache_lock:
+        cached = tenant.folder_page_cache.get(key)
+        if key in tenant.prefetching or (cached and time.time() - cached[0] < DRIVE_CACHE_SECONDS):
+            return
+        tenant.prefetching.add(key)
+
+    def worker():
+        with use_tenant(tenant):
+            try:
+                get_folder_contents(folder_id, page_token)
+            except Exception as e:
+                print(f"Error prefetching folder page: {e}")
+            finally:
+                with tenant.drive_cache_lock:
+                    tenant.prefetching.discard(key)
+
+    prefetch_executor.submit(worker)
+
+def get_folder_node(folder_id):
+    tenant = current_tenant()
+    node = tenant.folder_nodes.get(folder_id)
+    if node is None:
+        # Only reached for folders we have not listed a parent of yet
+        folder = drive_service.files().get(fileId=folder_id, fields="name,parents", supportsAllDrives=True).execute()
+        parents = folder.get('parents') or [None]
+        node = tenant.folder_nodes[folder_id] = FolderNode(folder['name'], parents[0])
+    return node
 
 def get_folder_path(folder_id):
+    root_folder_id = current_tenant().root_folder_id
     path = []
     current_id = folder_id
-    while current_id != ROOT_FOLDER_ID:
+    while current_id and current_id != root_folder_id:
         try:
-            folder = drive_service.files().get(fileId=current_id, fields="name,parents").execute()
-            path.append(folder['name'])
-            if 'parents' in folder and folder['parents']:
-                current_id = folder['parents'][0]
-            else:
-                break
-        except:
+            node = get_folder_node(current_id)
+        except Exception:
             break
+        path.append(node.name)
+        current_id = node.parent_id
     return " ➔ ".join(reversed(path)) if path else "Root"
 
-def show_folder(chat_id, page_token=None):
-    state = user_states.setdefault(chat_id, {'current_folder': ROOT_FOLDER_ID, 'folder_history': []})
+def show_folder(chat_id):
+    browse = user_states.get_or_create(chat_id).browse
     bot.send_chat_action(chat_id, "typing")
     try:
-        result = get_folder_contents(state['current_folder'], page_token)
+        page_token = browse.page_tokens[browse.page_index]
+        result = get_folder_contents(browse.folder_id, page_token)
         items = result.get('files', [])
         next_token = result.get('nextPageToken')
         markup = types.InlineKeyboardMarkup()
         for item in items:
-            icon = "📁" if item['mimeType'] == "application/vnd.google-apps.folder" else "📄"
-            markup.add(types.InlineKeyboardButton(f"{icon} {item['name']}", callback_data=f"item_{item['id']}"))
+            if item['mimeType'] == FOLDER_MIME_TYPE:
+                markup.add(types.InlineKeyboardButton(f"📁 {item['name']}", callback_data=f"docfolder_{item['id']}"))
+            else:
+                link = item.get('webViewLink') or f"https://drive.google.com/open?id={item['id']}"
+                markup.add(types.InlineKeyboardButton(f"📄 {item['name']}", url=link))
         nav_buttons = []
-        if state.get('page_token'):
-            nav_buttons.append(types.InlineKeyboardButton("◀️ Prev", callback_data=f"page_{state['page_token']}"))
+        if browse.page_index > 0:
+            nav_buttons.append(types.InlineKeyboardButton("◀️ Prev", callback_data="docpage_prev"))
         if next_token:
-            nav_buttons.append(types.InlineKeyboardButton("▶️ Next", callback_data=f"page_{next_token}"))
+            del browse.page_tokens[browse.page_index + 1:]
+            browse.page_tokens.append(next_token)
+            nav_buttons.append(types.InlineKeyboardButton("▶️ Next", callback_data="docpage_next"))
+            prefetch_folder_page(browse.folder_id, next_token)
         if nav_buttons:
             markup.row(*nav_buttons)
-        path = get_folder_path(state['current_folder'])
-        bot.send_message(chat_id, f"📂 *{path}*", parse_mode="Markdown", reply_markup=markup)
-        state['page_token'] = page_token
+        if browse.folder_id != current_tenant().root_folder_id:
+            markup.row(types.InlineKeyboardButton("⬆️ Up", callback_data="docup"))
+        path = get_folder_path(browse.folder_id)
+        # Folder names are user content (e.g. "Q3_reports"), so render them as escaped HTML
+        text = f"📂 <b>{html.escape(path)}</b>" if items else f"📂 <b>{html.escape(path)}</b>\n\nThis folder is empty."
+        show_view(chat_id, text, markup, "HTML")
     except Exception as e:
+        print(f"Error in show_folder: {str(e)}")
         bot.send_message(chat_id, "❌ Error loading folder. Please try again.", reply_markup=get_document_menu())
 
+@bot.message_handler(func=lambda message: message.text == "Documents")
+@require_auth
+@handle_errors
+@rate_limit
+def handle_documents(message):
+    root_folder_id = current_tenant().root_folder_id
+    if not root_folder_id:
+        bot.send_message(message.chat.id, "The document hub is not configured for your team (no root folder is set).")
+        return
+    session = user_states.get_or_create(message.chat.id)
+    session.section = 'documents'
+    session.browse = FolderBrowse(root_folder_id)
+    show_folder(message.chat.id)
+
+@bot.callback_query_handler(func=lambda call: call.data.startswith(("docfolder_", "docpage_")) or call.data == "docup")
+@require_auth
+@handle_errors
+def handle_document_navigation(call):
+    session = user_states.get_or_create(call.message.chat.id)
+    browse = session.browse
+    if browse is None or browse.tenant_id != current_tenant().id:
+        bot.answer_callback_query(call.id, "Please open Documents again.")
+        return
+    tenant = current_tenant()
+    if call.data.startswith("docfolder_"):
+        folder_id = call.data.split("_", 1)[1]
+        if folder_id not in tenant.folder_nodes:
+            # Only folders listed under this team's root can be opened
+            bot.answer_callback_query(call.id, "Folder not found.")
+            return
+        session.browse = FolderBrowse(folder_id)
+    elif call.data == "docup":
+        if browse.folder_id == tenant.root_folder_id:
+            bot.answer_callback_query(call.id)
+            return
+        parent_id = get_folder_node(browse.folder_id).parent_id
+        session.browse = FolderBrowse(parent_id or tenant.root_folder_id)
+    elif call.data == "docpage_next" and browse.page_index + 1 < len(browse.page_tokens):
+        browse.page_index += 1
+    elif call.data == "docpage_prev" and browse.page_index > 0:
+        browse.page_index -= 1
+    show_folder(call.message.chat.id)
+    bot.answer_callback_query(call.id)
+
 # === Project Tracking Functions ===
 
 def build_projects_keyboard(projects):
@@ -192,23 +1078,24 @@ def build_projects_keyboard(projects):
 def project_status_handler(message):
     print("Project Status Handler triggered:", message.text)
     # Make sure the correct section is set
-    if message.chat.id not in user_states:
-        user_states[message.chat.id] = {}
-    user_states[message.chat.id]['section'] = 'project'
+    user_states.get_or_create(message.chat.id).section = 'project'
     # Call list_projects directly to show the projects list
     list_projects(message.chat.id)
 
+def get_priority_icon(priority):
+    return {"high": "🔴", "medium": "🟡", "low": "🟢"}.get(priority.strip().lower(), "⚪")
+
 def list_projects(chat_id):
     try:
         print(f"list_projects function called for chat_id: {chat_id}")
         result = sheets_service.spreadsheets().values().get(
-            spreadsheetId=SPREADSHEET_ID,
+            spreadsheetId=current_tenant().spreadsheet_id,
             range="Projects!A2:F1000"
         ).execute()
         rows = result.get("values", [])
         print("Projects rows retrieved:", rows)
         if not rows:
-            bot.send_message(chat_id, "No projects found.", reply_markup=get_project_tracking_menu())
+            show_view(chat_id, "No projects found.")
             return
 
         # Prepare all projects in a single list with priority indicators
@@ -216,16 +1103,7 @@ def list_projects(chat_id):
         for row in rows:
             if len(row) < 2 or not row[0] or not row[1]:
                 continue
-            priority = row[3].strip().lower() if len(row) >= 4 else ""
-            if priority == "high":
-                priority_icon = "🔴"
-            elif priority == "medium":
-                priority_icon = "🟡"
-            elif priority == "low":
-                priority_icon = "🟢"
-            else:
-                priority_icon = "⚪"
-                
+            priority_icon = get_priority_icon(row[3] if len(row) >= 4 else "")
             projects_list.append((row, priority_icon))
         
         # Send a single message with all projects
@@ -234,82 +1112,120 @@ def list_projects(chat_id):
             for row, icon in projects_list:
                 btn = types.InlineKeyboardButton(text=f"{icon} {row[1]}", callback_data=f"projdetail_{row[0]}")
                 keyboard.add(btn)
-            bot.send_message(chat_id, "*All Projects:*", parse_mode="Markdown", reply_markup=keyboard)
+            show_view(chat_id, "*All Projects:*", keyboard, "Markdown")
             print(f"Sent project list to chat_id: {chat_id} with {len(projects_list)} projects")
         else:
-            bot.send_message(chat_id, "No projects found.", reply_markup=get_project_tracking_menu())
+            show_view(chat_id, "No projects found.")
             print(f"No projects found for chat_id: {chat_id}")
     except Exception as e:
         print(f"Error in list_projects: {str(e)}")
-        bot.send_message(chat_id, f"Error listing projects: {str(e)}", reply_markup=get_project_tracking_menu())
+        show_view(chat_id, f"Error listing projects: {str(e)}")
 
 # 2. Show Detailed Project Information & List Associated Tasks
+def get_project_rows(project_id, from_snapshot=False):
+    """Return (project row or None, the project's task rows).
+
+    Views redrawn right after our own writes pass from_snapshot=True: the snapshot already
+    holds those writes, so no Sheets reads are needed. Falls back to the sheet if the
+    snapshot is not loaded yet or does not know the project.
+    """
+    tenant = current_tenant()
+    if from_snapshot:
+        with tenant.snapshot_lock:
+            project = tenant.snapshot['projects'].get(project_id)
+            if tenant.snapshot['synced_at'] is not None and project and len(project) >= 2:
+                tasks = [task for _, task in sorted(tenant.snapshot['tasks'].items()) if task[0] == project_id]
+                return list(project), tasks
+    result = sheets_service.spreadsheets().values().get(
+        spreadsheetId=tenant.spreadsheet_id,
+        range="Projects!A2:F1000"
+    ).execute()
+    rows = result.get("values", [])
+    project = next((row for row in rows if len(row) >= 2 and row[0] == project_id), None)
+    if not project:
+        return None, []
+    tasks_result = sheets_service.spreadsheets().values().get(
+        spreadsheetId=tenant.spreadsheet_id,
+        range="Tasks!A2:E1000"
+    ).execute()
+    return project, [task for task in tasks_result.get("values", []) if task and task[0] == project_id]
+
+def build_project_detail(project_id, notice=None, from_snapshot=False):
+    """Return (text, keyboard) for the project detail screen, or (None, None) if the project is missing."""
+    project, task_rows = get_project_rows(project_id, from_snapshot)
+    if not project:
+        return None, None
+
+    project_name = project[1] if len(project) > 1 else "Unnamed"
+    assignee = project[2] if len(project) > 2 and project[2].strip() else "Not assigned"
+    priority = project[3] if len(project) > 3 and project[3].strip() else "Not set"
+    status = project[4] if len(project) > 4 and project[4].strip() else "Unknown"
+    notes = project[5] if len(project) > 5 and project[5].strip() else "No notes"
+
+    detail_msg = f"*Project:* {project_name}\n"
+    detail_msg += f"*Assignee:* {assignee}\n"
+    detail_msg += f"*Priority:* {priority}\n"
+    detail_msg += f"*Status:* {status}\n"
+    detail_msg += f"*Notes:* {notes}\n\n"
+    detail_msg += "*Tasks:*\n"
+
+    tasks_for_project = []
+    for task in task_rows:
+        if len(task) >= 2 and task[0] == project_id:
+            tdesc = task[1] if len(task) > 1 else "No description"
+            tstatus = task[2] if len(task) > 2 else "Not set"
+            tnotes = f" (Notes: {task[4]})" if len(task) >= 5 and task[4].strip() else ""
+            tasks_for_project.append(f"• {tdesc} [{tstatus}]{tnotes}")
+    if tasks_for_project:
+        detail_msg += "\n".join(tasks_for_project)
+    else:
+        detail_msg += "No tasks found."
+
+    # Build inline keyboard with additional project edit options.
+    keyboard = types.InlineKeyboardMarkup()
+    keyboard.row(
+        types.InlineKeyboardButton("Add Task", callback_data=f"projadd_{project_id}"),
+        types.InlineKeyboardButton("Edit Tasks", callback_data=f"projedit_{project_id}")
+    )
+    keyboard.row(
+        types.InlineKeyboardButton("Add Notes", callback_data=f"proj_editnotes_{project_id}"),
+        types.InlineKeyboardButton("Change Priority", callback_data=f"proj_editpriority_{project_id}")
+    )
+    keyboard.row(
+        types.InlineKeyboardButton("Change Status", callback_data=f"proj_editstatus_{project_id}"),
+        types.InlineKeyboardButton("Change Assignee", callback_data=f"proj_editassignee_{project_id}")
+    )
+    keyboard.row(
+        types.InlineKeyboardButton("Bulk Import Tasks", callback_data=f"projbulk_{project_id}"),
+        types.InlineKeyboardButton("Bulk Edit Tasks", callback_data=f"projmulti_{project_id}")
+    )
+    keyboard.row(
+        types.InlineKeyboardButton("Back to Projects", callback_data="projback")
+    )
+
+    if notice:
+        detail_msg = f"{notice}\n\n{detail_msg}"
+    return detail_msg, keyboard
+
+def show_project_view(chat_id, project_id, notice=None):
+    """Redraw the project after a flow finishes; built from the snapshot the flow just updated."""
+    detail_msg, keyboard = build_project_detail(project_id, notice, from_snapshot=True)
+    if detail_msg is None:
+        show_view(chat_id, notice or "Project not found.")
+        return
+    show_view(chat_id, detail_msg, keyboard, "Markdown")
+
 @bot.callback_query_handler(func=lambda call: call.data.startswith("projdetail_"))
 @require_auth
 @handle_errors
 def handle_project_detail(call):
     project_id = call.data.split("_", 1)[1]
     try:
-        result = sheets_service.spreadsheets().values().get(
-            spreadsheetId=SPREADSHEET_ID,
-            range="Projects!A2:F1000"
-        ).execute()
-        rows = result.get("values", [])
-        project = next((row for row in rows if len(row) >= 2 and row[0] == project_id), None)
-        if not project:
+        detail_msg, keyboard = build_project_detail(project_id)
+        if detail_msg is None:
             bot.answer_callback_query(call.id, "Project not found.")
             return
-
-        project_name = project[1] if len(project) > 1 else "Unnamed"
-        assignee = project[2] if len(project) > 2 and project[2].strip() else "Not assigned"
-        priority = project[3] if len(project) > 3 and project[3].strip() else "Not set"
-        status = project[4] if len(project) > 4 and project[4].strip() else "Unknown"
-        notes = project[5] if len(project) > 5 and project[5].strip() else "No notes"
-
-        detail_msg = f"*Project:* {project_name}\n"
-        detail_msg += f"*Assignee:* {assignee}\n"
-        detail_msg += f"*Priority:* {priority}\n"
-        detail_msg += f"*Status:* {status}\n"
-        detail_msg += f"*Notes:* {notes}\n\n"
-        detail_msg += "*Tasks:*\n"
-
-        tasks_result = sheets_service.spreadsheets().values().get(
-            spreadsheetId=SPREADSHEET_ID,
-            range="Tasks!A2:E1000"
-        ).execute()
-        task_rows = tasks_result.get("values", [])
-        tasks_for_project = []
-        for task in task_rows:
-            if len(task) >= 2 and task[0] == project_id:
-                tdesc = task[1] if len(task) > 1 else "No description"
-                tstatus = task[2] if len(task) > 2 else "Not set"
-                tnotes = f" (Notes: {task[4]})" if len(task) >= 5 and task[4].strip() else ""
-                tasks_for_project.append(f"• {tdesc} [{tstatus}]{tnotes}")
-        if tasks_for_project:
-            detail_msg += "\n".join(tasks_for_project)
-        else:
-            detail_msg += "No tasks found."
-
-        # Build inline keyboard with additional project edit options.
-        keyboard = types.InlineKeyboardMarkup()
-        keyboard.row(
-            types.InlineKeyboardButton("Add Task", callback_data=f"projadd_{project_id}"),
-            types.InlineKeyboardButton("Edit Tasks", callback_data=f"projedit_{project_id}")
-        )
-        keyboard.row(
-            types.InlineKeyboardButton("Add Notes", callback_data=f"proj_editnotes_{project_id}"),
-            types.InlineKeyboardButton("Change Priority", callback_data=f"proj_editpriority_{project_id}")
-        )
-        keyboard.row(
-            types.InlineKeyboardButton("Change Status", callback_data=f"proj_editstatus_{project_id}"),
-            types.InlineKeyboardButton("Change Assignee", callback_data=f"proj_editassignee_{project_id}")
-        )
-        keyboard.row(
-            types.InlineKeyboardButton("Back to Projects", callback_data="projback")
-        )
-
-        bot.edit_message_text(chat_id=call.message.chat.id, message_id=call.message.message_id,
-                              text=detail_msg, parse_mode="Markdown", reply_markup=keyboard)
+        show_view(call.message.chat.id, detail_msg, keyboard, "Markdown")
         bot.answer_callback_query(call.id)
     except Exception as e:
         bot.answer_callback_query(call.id, f"Error retrieving project: {str(e)}")
@@ -317,7 +1233,7 @@ def handle_project_detail(call):
 # === Assignee Multi-Selection ===
 def build_assignee_keyboard(assignees_selected):
     keyboard = types.InlineKeyboardMarkup(row_width=2)
-    for assignee in available_assignees:
+    for assignee in current_tenant().access_config.assignees:
         selection_mark = "✅" if assignee in assignees_selected else "❌"
         keyboard.add(types.InlineKeyboardButton(f"{selection_mark} {assignee}", callback_data=f"toggle_assignee_{assignee}"))
     keyboard.row(types.InlineKeyboardButton("✓ Confirm Selection", callback_data="assignee_confirm"))
@@ -339,117 +1255,215 @@ def handle_proj_back(call):
 @handle_errors
 def initiate_add_task(call):
     project_id = call.data.split("_", 1)[1]
-    state = user_states.setdefault(call.message.chat.id, {})
-    state['action'] = 'add_task'
-    state['add_task_project_id'] = project_id
-    state['add_task_step'] = 'description'
+    session = user_states.get_or_create(call.message.chat.id)
+    session.start_flow('add_task', TaskFlow(project_id), 'description')
     bot.answer_callback_query(call.id, "Let's add a new task.")
-    bot.send_message(call.message.chat.id, "Enter new task Description:")
+    show_view(call.message.chat.id, "Enter new task Description:")
 
-@bot.message_handler(func=lambda m: user_states.get(m.chat.id, {}).get('action') == 'add_task' and user_states[m.chat.id].get('add_task_step') == 'description')
+@bot.message_handler(func=lambda m: in_flow(m, 'add_task', 'description') and not is_menu_or_command(m.text))
 @require_auth
 @handle_errors
 @rate_limit
 def add_task_description_handler(message):
-    state = user_states[message.chat.id]
-    state['new_task_desc'] = message.text.strip()
-    state['add_task_step'] = 'status'
+    session = user_states.get(message.chat.id)
+    session.flow.desc = message.text.strip()
+    session.step = 'status'
     keyboard = types.InlineKeyboardMarkup()
     keyboard.row(
         types.InlineKeyboardButton("Not Done", callback_data="task_status_Not Done"),
         types.InlineKeyboardButton("In Progress", callback_data="task_status_In Progress"),
         types.InlineKeyboardButton("Done", callback_data="task_status_Done")
     )
-    bot.send_message(message.chat.id, "Select task status:", reply_markup=keyboard)
+    show_view(message.chat.id, "Select task status:", keyboard)
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith("task_status_") and user_states.get(call.message.chat.id, {}).get('action') == 'add_task' and user_states[call.message.chat.id].get('add_task_step') == 'status')
+@bot.callback_query_handler(func=lambda call: call.data.startswith("task_status_") and in_flow(call, 'add_task', 'status'))
 @require_auth
 @handle_errors
 def add_task_status_handler(call):
-    state = user_states[call.message.chat.id]
-    status_val = call.data.split("task_status_")[1]
-    state['new_task_status'] = status_val
-    state['add_task_step'] = 'assignee'
-    state['new_task_assignees'] = []
-    keyboard = build_assignee_keyboard(state['new_task_assignees'])
+    session = user_states.get(call.message.chat.id)
+    session.flow.status = call.data.split("task_status_")[1]
+    session.flow.assignees = []
+    session.step = 'assignee'
+    keyboard = build_assignee_keyboard(session.flow.assignees)
     bot.edit_message_text("Select assignee(s) for the task:", chat_id=call.message.chat.id, message_id=call.message.message_id, reply_markup=keyboard)
     bot.answer_callback_query(call.id)
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith("toggle_assignee_") and user_states.get(call.message.chat.id, {}).get('action') == 'add_task' and user_states[call.message.chat.id].get('add_task_step') == 'assignee')
+def toggle_flow_assignee(chat_id, assignee):
+    """Toggle an assignee in the chat's task flow and return the new selection."""
+    with user_states.lock(chat_id):
+        selected = user_states.get(chat_id).flow.assignees
+        if assignee in selected:
+            selected.remove(assignee)
+        else:
+            selected.append(assignee)
+        return list(selected)
+
+@bot.callback_query_handler(func=lambda call: call.data.startswith("toggle_assignee_") and in_flow(call, 'add_task', 'assignee'))
 @require_auth
 @handle_errors
 def toggle_assignee_handler(call):
-    state = user_states[call.message.chat.id]
     assignee = call.data.split("toggle_assignee_")[1]
-    selected = state.get('new_task_assignees', [])
-    if assignee in selected:
-        selected.remove(assignee)
-    else:
-        selected.append(assignee)
-    state['new_task_assignees'] = selected
-    keyboard = build_assignee_keyboard(selected)
+    keyboard = build_assignee_keyboard(toggle_flow_assignee(call.message.chat.id, assignee))
     bot.edit_message_reply_markup(chat_id=call.message.chat.id, message_id=call.message.message_id, reply_markup=keyboard)
     bot.answer_callback_query(call.id)
 
-@bot.callback_query_handler(func=lambda call: call.data == "assignee_confirm" and user_states.get(call.message.chat.id, {}).get('action') == 'add_task' and user_states[call.message.chat.id].get('add_task_step') == 'assignee')
+@bot.callback_query_handler(func=lambda call: call.data == "assignee_confirm" and in_flow(call, 'add_task', 'assignee'))
 @require_auth
 @handle_errors
 def confirm_assignee_handler(call):
-    state = user_states[call.message.chat.id]
-    state['new_task_assignees_final'] = state.get('new_task_assignees', [])
-    state['add_task_step'] = 'notes'
+    user_states.get(call.message.chat.id).step = 'notes'
     keyboard = types.InlineKeyboardMarkup()
     keyboard.add(types.InlineKeyboardButton("No Notes", callback_data="notes_none"))
     bot.edit_message_text("Enter additional notes for the task (or click 'No Notes'):", chat_id=call.message.chat.id, message_id=call.message.message_id, reply_markup=keyboard)
     bot.answer_callback_query(call.id)
 
-@bot.callback_query_handler(func=lambda call: call.data == "notes_none" and user_states.get(call.message.chat.id, {}).get('action') == 'add_task' and user_states[call.message.chat.id].get('add_task_step') == 'notes')
+@bot.callback_query_handler(func=lambda call: call.data == "notes_none" and in_flow(call, 'add_task', 'notes'))
 @require_auth
 @handle_errors
 def no_notes_handler(call):
-    state = user_states[call.message.chat.id]
-    state['new_task_notes'] = ""
-    finalize_new_task(call.message.chat.id, call.from_user.username)
+    finalize_new_task(call.message.chat.id, call.from_user.username, "")
     bot.answer_callback_query(call.id, "Task added with no notes.")
 
-@bot.message_handler(func=lambda m: user_states.get(m.chat.id, {}).get('action') == 'add_task' and user_states[m.chat.id].get('add_task_step') == 'notes')
+@bot.message_handler(func=lambda m: in_flow(m, 'add_task', 'notes') and not is_menu_or_command(m.text))
 @require_auth
 @handle_errors
 @rate_limit
 def add_task_notes_handler(message):
-    state = user_states[message.chat.id]
-    state['new_task_notes'] = message.text.strip()
-    finalize_new_task(message.chat.id, message.from_user.username)
-
-def finalize_new_task(chat_id, username):
-    state = user_states.get(chat_id, {})
-    project_id = state.get('add_task_project_id')
-    desc = state.get('new_task_desc', '(No Description)')
-    status_val = state.get('new_task_status', '(No Status)')
-    assignees = state.get('new_task_assignees_final', [])
-    assignee_str = ", ".join(assignees) if assignees else ""
-    notes = state.get('new_task_notes', ' ')
+    finalize_new_task(message.chat.id, message.from_user.username, message.text.strip())
+
+def finalize_new_task(chat_id, username, notes):
+    flow = take_flow(chat_id, 'add_task')
+    if flow is None:
+        return  # already submitted
+    project_id = flow.project_id
+    desc = flow.desc or '(No Description)'
+    status_val = flow.status or '(No Status)'
+    assignee_str = ", ".join(flow.assignees)
     new_task = [project_id, desc, status_val, assignee_str, notes]
     try:
-        sheets_service.spreadsheets().values().append(
-            spreadsheetId=SPREADSHEET_ID,
+        response = sheets_service.spreadsheets().values().append(
+            spreadsheetId=current_tenant().spreadsheet_id,
             range="Tasks!A:E",
             valueInputOption="USER_ENTERED",
             insertDataOption="INSERT_ROWS",
             body={"values": [new_task]}
         ).execute()
-        bot.send_message(chat_id, "Task added successfully.", reply_markup=get_project_tracking_menu())
+        record_task_write(get_row_from_range(response.get("updates", {}).get("updatedRange")), new_task)
+        show_project_view(chat_id, project_id, "✅ Task added successfully.")
         
         # Add notification
         project_name = get_project_name_by_id(project_id)
         add_notification(f"🔔 @{username} added task '{desc}' to project '{project_name}'")
 
     except Exception as e:
-        bot.send_message(chat_id, f"Error adding task: {str(e)}", reply_markup=get_project_tracking_menu())
-    finally:
-        # Clean up state
-        for k in ['action','add_task_project_id','add_task_step','new_task_desc','new_task_status','new_task_assignees','new_task_assignees_final','new_task_notes']:
-            state.pop(k, None)
+        show_view(chat_id, f"Error adding task: {str(e)}")
+
+# === Bulk Task Import ===
+BULK_IMPORT_HELP = (
+    "Send the tasks to import, one per line, or upload a CSV file:\n"
+    "`Description, Status, Assignee1; Assignee2, Notes`\n\n"
+    "Status is one of: Not Done, In Progress, Done (empty means Not Done). "
+    "Assignees and notes are optional."
+)
+
+@bot.callback_query_handler(func=lambda call: call.data.startswith("projbulk_"))
+@require_auth
+@handle_errors
+def initiate_bulk_import(call):
+    project_id = call.data.split("_", 1)[1]
+    user_states.get_or_create(call.message.chat.id).start_flow('bulk_import', ProjectFlow(project_id))
+    bot.answer_callback_query(call.id, "Send tasks to import.")
+    show_view(call.message.chat.id, BULK_IMPORT_HELP, get_bulk_import_keyboard(), "Markdown")
+
+def get_bulk_import_keyboard():
+    keyboard = types.InlineKeyboardMarkup()
+    keyboard.add(types.InlineKeyboardButton("Cancel", callback_data="bulkimport_cancel"))
+    return keyboard
+
+def parse_bulk_tasks(text, project_id):
+    """Validate every line first; return (rows, errors) so nothing is written if any line is bad."""
+    rows = []
+    errors = []
+    for line_num, fields in enumerate(csv.reader(io.StringIO(text), skipinitialspace=True), start=1):
+        fields = [field.strip() for field in fields]
+        if not any(fields):
+            continue
+        if line_num == 1 and fields[0].lower() == "description":
+            continue  # header row of an uploaded CSV
+        fields += [""] * (4 - len(fields))
+        desc, status_val, assignee_field, notes = fields[0], fields[1], fields[2], ", ".join(f for f in fields[3:] if f)
+        if not desc:
+            errors.append(f"Line {line_num}: description is empty.")
+            continue
+        status_val = next((s for s in TASK_STATUSES if s.lower() == status_val.lower()), status_val) or "Not Done"
+        if status_val not in TASK_STATUSES:
+            errors.append(f"Line {line_num}: unknown status '{status_val}'.")
+            continue
+        assignees = [name.strip() for name in assignee_field.split(";") if name.strip()]
+        unknown = [name for name in assignees if name not in current_tenant().access_config.assignees]
+        if unknown:
+            errors.append(f"Line {line_num}: unknown assignee(s) {', '.join(unknown)}.")
+            continue
+        rows.append([project_id, desc, status_val, ", ".join(assignees), notes])
+    return rows, errors
+
+def import_bulk_tasks(chat_id, username, text):
+    project_id = user_states.get(chat_id).flow.project_id
+    rows, errors = parse_bulk_tasks(text, project_id)
+    if errors:
+        # Keep the import flow active so the user can send a corrected list
+        show_view(chat_id, "Nothing was imported:\n" + "\n".join(errors[:20]), get_bulk_import_keyboard())
+        return
+    if not rows:
+        show_view(chat_id, "No tasks found in the input.", get_bulk_import_keyboard())
+        return
+    if take_flow(chat_id, 'bulk_import') is None:
+        return  # already imported
+    try:
+        response = sheets_service.spreadsheets().values().append(
+            spreadsheetId=current_tenant().spreadsheet_id,
+            range="Tasks!A:E",
+            valueInputOption="USER_ENTERED",
+            insertDataOption="INSERT_ROWS",
+            body={"values": rows}
+        ).execute()
+        first_row = get_row_from_range(response.get("updates", {}).get("updatedRange"))
+        if first_row:
+            for offset, row in enumerate(rows):
+                record_task_write(first_row + offset, row)
+        show_project_view(chat_id, project_id, f"✅ Imported {len(rows)} tasks.")
+
+        project_name = get_project_name_by_id(project_id)
+        add_notification(f"🔔 @{username} imported {len(rows)} tasks into project '{project_name}'")
+    except Exception as e:
+        show_view(chat_id, f"Error importing tasks: {str(e)}")
+
+@bot.message_handler(func=lambda m: in_flow(m, 'bulk_import') and not is_menu_or_command(m.text))
+@require_auth
+@handle_errors
+@rate_limit
+def bulk_import_text_handler(message):
+    import_bulk_tasks(message.chat.id, message.from_user.username, message.text)
+
+@bot.callback_query_handler(func=lambda call: call.data == "bulkimport_cancel")
+@require_auth
+@handle_errors
+def bulk_import_cancel_handler(call):
+    flow = take_flow(call.message.chat.id, 'bulk_import')
+    if flow is None:
+        bot.answer_callback_query(call.id, "No import in progress.")
+        return
+    show_project_view(call.message.chat.id, flow.project_id, "Bulk import cancelled.")
+    bot.answer_callback_query(call.id)
+
+@bot.message_handler(content_types=["document"], func=lambda m: in_flow(m, 'bulk_import'))
+@require_auth
+@handle_errors
+@rate_limit
+def bulk_import_file_handler(message):
+    file_info = bot.get_file(message.document.file_id)
+    content = bot.download_file(file_info.file_path).decode("utf-8-sig")
+    import_bulk_tasks(message.chat.id, message.from_user.username, content)
 
 # === Editing Existing Task Flow ===
 
@@ -460,7 +1474,7 @@ def handle_project_edit_tasks(call):
     project_id = call.data.split("_", 1)[1]
     try:
         result = sheets_service.spreadsheets().values().get(
-            spreadsheetId=SPREADSHEET_ID,
+            spreadsheetId=current_tenant().spreadsheet_id,
             range="Tasks!A2:E1000"
         ).execute()
         rows = result.get("values", [])
@@ -493,122 +1507,308 @@ def handle_edit_task_callback(call):
         bot.answer_callback_query(call.id, "Invalid edit task callback.")
         return
     project_id = parts[1]
-    task_row = parts[2]
-    state = user_states.setdefault(call.message.chat.id, {})
-    state['action'] = 'edit_task'
-    state['edit_task_project_id'] = project_id
-    state['edit_task_row'] = task_row
-    state['edit_task_step'] = 'description'
+    task_row = int(parts[2])
+    task = read_task_rows([task_row])[task_row]
+    if get_task_identity(task)[0] != project_id:
+        # The list is out of date, e.g. another chat deleted rows above this task
+        bot.answer_callback_query(call.id, "This task list is out of date, please open it again.")
+        return
+    desc = get_task_identity(task)[1]
+    session = user_states.get_or_create(call.message.chat.id)
+    session.start_flow('edit_task', TaskFlow(project_id, task_row, desc), 'description')
     bot.answer_callback_query(call.id, "Editing task.")
-    bot.send_message(call.message.chat.id, "Enter new task Description:")
+    show_view(call.message.chat.id, f"Editing task: {desc or '(No Description)'}\nEnter new task Description:")
 
-@bot.message_handler(func=lambda m: user_states.get(m.chat.id, {}).get('action') == 'edit_task' and user_states[m.chat.id].get('edit_task_step') == 'description')
+@bot.message_handler(func=lambda m: in_flow(m, 'edit_task', 'description') and not is_menu_or_command(m.text))
 @require_auth
 @handle_errors
 @rate_limit
 def edit_task_description_handler(message):
-    state = user_states[message.chat.id]
-    state['edit_task_desc'] = message.text.strip()
-    state['edit_task_step'] = 'status'
+    session = user_states.get(message.chat.id)
+    session.flow.desc = message.text.strip()
+    session.step = 'status'
     keyboard = types.InlineKeyboardMarkup()
     keyboard.row(
         types.InlineKeyboardButton("Not Done", callback_data="edit_task_status_Not Done"),
         types.InlineKeyboardButton("In Progress", callback_data="edit_task_status_In Progress"),
         types.InlineKeyboardButton("Done", callback_data="edit_task_status_Done")
     )
-    bot.send_message(message.chat.id, "Select new task status:", reply_markup=keyboard)
+    show_view(message.chat.id, "Select new task status:", keyboard)
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith("edit_task_status_") and user_states.get(call.message.chat.id, {}).get('action') == 'edit_task' and user_states[call.message.chat.id].get('edit_task_step') == 'status')
+@bot.callback_query_handler(func=lambda call: call.data.startswith("edit_task_status_") and in_flow(call, 'edit_task', 'status'))
 @require_auth
 @handle_errors
 def edit_task_status_handler(call):
-    state = user_states[call.message.chat.id]
-    status_val = call.data.split("edit_task_status_")[1]
-    state['edit_task_status'] = status_val
-    state['edit_task_step'] = 'assignee'
-    state['edit_task_assignees'] = []
-    keyboard = build_assignee_keyboard(state['edit_task_assignees'])
+    session = user_states.get(call.message.chat.id)
+    session.flow.status = call.data.split("edit_task_status_")[1]
+    session.flow.assignees = []
+    session.step = 'assignee'
+    keyboard = build_assignee_keyboard(session.flow.assignees)
     bot.edit_message_text("Select new assignee(s) for the task:", chat_id=call.message.chat.id, message_id=call.message.message_id, reply_markup=keyboard)
     bot.answer_callback_query(call.id)
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith("toggle_assignee_") and user_states.get(call.message.chat.id, {}).get('action') == 'edit_task' and user_states[call.message.chat.id].get('edit_task_step') == 'assignee')
+@bot.callback_query_handler(func=lambda call: call.data.startswith("toggle_assignee_") and in_flow(call, 'edit_task', 'assignee'))
 @require_auth
 @handle_errors
 def toggle_edit_assignee_handler(call):
-    state = user_states[call.message.chat.id]
     assignee = call.data.split("toggle_assignee_")[1]
-    selected = state.get('edit_task_assignees', [])
-    if assignee in selected:
-        selected.remove(assignee)
-    else:
-        selected.append(assignee)
-    state['edit_task_assignees'] = selected
-    keyboard = build_assignee_keyboard(selected)
+    keyboard = build_assignee_keyboard(toggle_flow_assignee(call.message.chat.id, assignee))
     bot.edit_message_reply_markup(chat_id=call.message.chat.id, message_id=call.message.message_id, reply_markup=keyboard)
     bot.answer_callback_query(call.id)
 
-@bot.callback_query_handler(func=lambda call: call.data == "assignee_confirm" and user_states.get(call.message.chat.id, {}).get('action') == 'edit_task' and user_states[call.message.chat.id].get('edit_task_step') == 'assignee')
+@bot.callback_query_handler(func=lambda call: call.data == "assignee_confirm" and in_flow(call, 'edit_task', 'assignee'))
 @require_auth
 @handle_errors
 def edit_assignee_confirm_handler(call):
-    state = user_states[call.message.chat.id]
-    state['edit_task_assignees_final'] = state.get('edit_task_assignees', [])
-    state['edit_task_step'] = 'notes'
+    user_states.get(call.message.chat.id).step = 'notes'
     keyboard = types.InlineKeyboardMarkup()
     keyboard.add(types.InlineKeyboardButton("No Notes", callback_data="edit_notes_none"))
     bot.edit_message_text("Enter new additional notes (or click 'No Notes'):", chat_id=call.message.chat.id, message_id=call.message.message_id, reply_markup=keyboard)
     bot.answer_callback_query(call.id)
 
-@bot.callback_query_handler(func=lambda call: call.data == "edit_notes_none" and user_states.get(call.message.chat.id, {}).get('action') == 'edit_task' and user_states[call.message.chat.id].get('edit_task_step') == 'notes')
+@bot.callback_query_handler(func=lambda call: call.data == "edit_notes_none" and in_flow(call, 'edit_task', 'notes'))
 @require_auth
 @handle_errors
 def edit_no_notes_handler(call):
-    state = user_states[call.message.chat.id]
-    state['edit_task_notes'] = ""
-    finalize_edit_task(call.message.chat.id, call.from_user.username)
+    finalize_edit_task(call.message.chat.id, call.from_user.username, "")
     bot.answer_callback_query(call.id, "Task updated with no notes.")
 
-@bot.message_handler(func=lambda m: user_states.get(m.chat.id, {}).get('action') == 'edit_task' and user_states[m.chat.id].get('edit_task_step') == 'notes')
+@bot.message_handler(func=lambda m: in_flow(m, 'edit_task', 'notes') and not is_menu_or_command(m.text))
 @require_auth
 @handle_errors
 @rate_limit
 def edit_task_notes_handler(message):
-    state = user_states[message.chat.id]
-    state['edit_task_notes'] = message.text.strip()
-    finalize_edit_task(message.chat.id, message.from_user.username)
-
-def finalize_edit_task(chat_id, username):
-    state = user_states.get(chat_id, {})
-    project_id = state.get('edit_task_project_id')
-    task_row = state.get('edit_task_row')
-    new_desc = state.get('edit_task_desc', '(No Description)')
-    new_status = state.get('edit_task_status', '(No Status)')
-    assignees = state.get('edit_task_assignees_final', [])
-    assignee_str = ", ".join(assignees) if assignees else ""
-    new_notes = state.get('edit_task_notes', ' ')
+    finalize_edit_task(message.chat.id, message.from_user.username, message.text.strip())
+
+def finalize_edit_task(chat_id, username, new_notes):
+    flow = take_flow(chat_id, 'edit_task')
+    if flow is None:
+        return  # already submitted
+    project_id = flow.project_id
+    new_desc = flow.desc or '(No Description)'
+    new_status = flow.status or '(No Status)'
+    assignee_str = ", ".join(flow.assignees)
     # Note: Project ID (Column A) is not updated here
     new_row_data = [new_desc, new_status, assignee_str, new_notes]
     try:
+        # Rows may have moved or changed since the flow started; never overwrite a different task
+        task_row = find_task_row(project_id, flow.original_desc, flow.row)
+        if task_row is None:
+            show_project_view(chat_id, project_id, "⚠️ The task was changed or deleted by someone else, so your edit was not saved.")
+            return
         update_range = f"Tasks!B{task_row}:E{task_row}" # Update columns B to E
         body = {"values": [new_row_data]}
         sheets_service.spreadsheets().values().update(
-            spreadsheetId=SPREADSHEET_ID,
+            spreadsheetId=current_tenant().spreadsheet_id,
             range=update_range,
             valueInputOption="USER_ENTERED", # Changed to USER_ENTERED
             body=body
         ).execute()
-        bot.send_message(chat_id, "Task updated successfully.", reply_markup=get_project_tracking_menu())
+        record_task_write(task_row, [project_id] + new_row_data)
+        show_project_view(chat_id, project_id, "✅ Task updated successfully.")
         
         # Add notification
         project_name = get_project_name_by_id(project_id)
         add_notification(f"🔔 @{username} updated task '{new_desc}' in project '{project_name}'")
 
     except Exception as e:
-        bot.send_message(chat_id, f"Error updating task: {str(e)}", reply_markup=get_project_tracking_menu())
-    finally:
-        # Clean up state
-        for k in ['action','edit_task_project_id','edit_task_row','edit_task_desc','edit_task_status','edit_task_assignees','edit_task_assignees_final','edit_task_notes','edit_task_step']:
-            state.pop(k, None)
+        show_view(chat_id, f"Error updating task: {str(e)}")
+
+# === Multi-Select Bulk Task Operations ===
+def get_sheet_id(title):
+    tenant = current_tenant()
+    sheet_ids = tenant.sheet_ids  # sheet title -> numeric sheetId, needed for row deletion
+    if title not in sheet_ids:
+        result = sheets_service.spreadsheets().get(
+            spreadsheetId=tenant.spreadsheet_id,
+            fields="sheets.properties(sheetId,title)"
+        ).execute()
+        for sheet in result.get("sheets", []):
+            sheet_ids[sheet["properties"]["title"]] = sheet["properties"]["sheetId"]
+    return sheet_ids[title]
+
+def build_bulk_task_keyboard(flow):
+    keyboard = types.InlineKeyboardMarkup()
+    for row_num, task in sorted(flow.tasks.items()):
+        mark = "✅" if row_num in flow.selected else "⬜"
+        desc = task[1] if len(task) > 1 else "No description"
+        keyboard.add(types.InlineKeyboardButton(f"{mark} {desc} [{get_task_status(task)}]", callback_data=f"bulksel_{row_num}"))
+    keyboard.row(
+        types.InlineKeyboardButton("Set Status", callback_data="bulkmenu_status"),
+        types.InlineKeyboardButton("Delete", callback_data="bulkmenu_delete")
+    )
+    keyboard.row(
+        types.InlineKeyboardButton("Add Assignee", callback_data="bulkmenu_addassignee"),
+        types.InlineKeyboardButton("Remove Assignee", callback_data="bulkmenu_rmassignee")
+    )
+    keyboard.row(types.InlineKeyboardButton("Back to Project", callback_data="bulkdone"))
+    return keyboard
+
+def show_bulk_task_list(call, flow):
+    text = f"Select tasks, then choose an action ({len(flow.selected)} selected):"
+    bot.edit_message_text(text, chat_id=call.message.chat.id, message_id=call.message.message_id,
+                          reply_markup=build_bulk_task_keyboard(flow))
+
+def bulk_state_active(call):
+    return in_flow(call, 'bulk_edit')
+
+def fetch_project_tasks(project_id):
+    """Current Tasks rows of a project -> {sheet row number: row}."""
+    result = sheets_service.spreadsheets().values().get(
+        spreadsheetId=current_tenant().spreadsheet_id,
+        range="Tasks!A2:E1000"
+    ).execute()
+    return {row_num: row for row_num, row in enumerate(result.get("values", []), start=2) if row and row[0] == project_id}
+
+@bot.callback_query_handler(func=lambda call: call.data.startswith("projmulti_"))
+@require_auth
+@handle_errors
+def initiate_bulk_edit(call):
+    project_id = call.data.split("_", 1)[1]
+    tasks = fetch_project_tasks(project_id)
+    if not tasks:
+        bot.answer_callback_query(call.id, "No tasks to edit for this project.")
+        return
+    flow = BulkEditFlow(project_id, tasks)
+    user_states.get_or_create(call.message.chat.id).start_flow('bulk_edit', flow)
+    show_bulk_task_list(call, flow)
+    bot.answer_callback_query(call.id)
+
+@bot.callback_query_handler(func=lambda call: call.data.startswith("bulksel_") and bulk_state_active(call))
+@require_auth
+@handle_errors
+def bulk_toggle_task_handler(call):
+    flow = user_states.get(call.message.chat.id).flow
+    row_num = int(call.data.split("_", 1)[1])
+    with user_states.lock(call.message.chat.id):
+        if row_num in flow.selected:
+            flow.selected.remove(row_num)
+        elif row_num in flow.tasks:
+            flow.selected.append(row_num)
+        # Otherwise the tap came from a keyboard drawn before rows were renumbered; just redraw
+    show_bulk_task_list(call, flow)
+    bot.answer_callback_query(call.id)
+
+@bot.callback_query_handler(func=lambda call: call.data.startswith("bulkmenu_") and bulk_state_active(call))
+@require_auth
+@handle_errors
+def bulk_action_menu_handler(call):
+    flow = user_states.get(call.message.chat.id).flow
+    menu = call.data.split("_", 1)[1]
+    if not flow.selected:
+        bot.answer_callback_query(call.id, "Select at least one task first.")
+        return
+    keyboard = types.InlineKeyboardMarkup(row_width=2)
+    if menu == "status":
+        text = "Set status of the selected tasks to:"
+        for status_val in TASK_STATUSES:
+            keyboard.add(types.InlineKeyboardButton(status_val, callback_data=f"bulkapply_status_{status_val}"))
+    elif menu in ("addassignee", "rmassignee"):
+        text = "Add assignee to the selected tasks:" if menu == "addassignee" else "Remove assignee from the selected tasks:"
+        for name in current_tenant().access_config.assignees:
+            keyboard.add(types.InlineKeyboardButton(name, callback_data=f"bulkapply_{menu}_{name}"))
+    else:
+        text = f"Delete {len(flow.selected)} selected task(s)? This cannot be undone."
+        keyboard.add(types.InlineKeyboardButton("🗑 Delete", callback_data="bulkapply_delete_"))
+    keyboard.add(types.InlineKeyboardButton("Cancel", callback_data="bulkapply_cancel_"))
+    bot.edit_message_text(text, chat_id=call.message.chat.id, message_id=call.message.message_id, reply_markup=keyboard)
+    bot.answer_callback_query(call.id)
+
+@bot.callback_query_handler(func=lambda call: call.data.startswith("bulkapply_") and bulk_state_active(call))
+@require_auth
+@handle_errors
+def bulk_apply_handler(call):
+    chat_id = call.message.chat.id
+    flow = user_states.get(chat_id).flow
+    _, operation, value = call.data.split("_", 2)
+    with user_states.lock(chat_id):
+        # Claim the selection so a double-tapped button cannot apply the operation twice
+        # and drop rows the flow no longer knows about (renumbered by a delete)
+        selected = []
+        if operation != "cancel":
+            selected = sorted(row_num for row_num in flow.selected if row_num in flow.tasks)
+            flow.selected = []
+    if not selected:
+        show_bulk_task_list(call, flow)
+        bot.answer_callback_query(call.id)
+        return
+
+    # The list may be stale: other chats can edit, move or delete rows after it was opened.
+    # Re-read the selected rows and only act if they still hold the tasks that were shown.
+    fresh = read_task_rows(selected)
+    if any(get_task_identity(fresh[row_num]) != get_task_identity(flow.tasks[row_num]) for row_num in selected):
+        flow.tasks = fetch_project_tasks(flow.project_id)
+        if flow.tasks:
+            show_bulk_task_list(call, flow)
+        else:
+            bot.edit_message_text("No tasks left in this project.", chat_id=chat_id, message_id=call.message.message_id)
+        bot.answer_callback_query(call.id, "Tasks were changed by someone else. The list was refreshed, please select again.")
+        return
+    tasks = flow.tasks
+    tasks.update(fresh)
+
+    if operation == "delete":
+        # Delete bottom-up so earlier deletions do not shift the later row indexes
+        sheet_id = get_sheet_id("Tasks")
+        requests = [{"deleteDimension": {"range": {"sheetId": sheet_id, "dimension": "ROWS",
+                                                   "startIndex": row_num - 1, "endIndex": row_num}}}
+                    for row_num in reversed(selected)]
+        sheets_service.spreadsheets().batchUpdate(spreadsheetId=current_tenant().spreadsheet_id, body={"requests": requests}).execute()
+        record_task_deletes(selected)
+        deleted = set(selected)
+        flow.tasks = {row_num - bisect.bisect_left(selected, row_num): task
+                      for row_num, task in tasks.items() if row_num not in deleted}
+        summary = f"deleted {len(selected)} task(s)"
+    else:
+        updated = {}
+        for row_num in selected:
+            task = tasks[row_num] + [""] * (5 - len(tasks[row_num]))
+            if operation == "status":
+                task[2] = value
+            else:
+                names = [name for name in get_task_assignees(task) if name != "Unassigned"]
+                if operation == "addassignee" and value not in names:
+                    names.append(value)
+                elif operation == "rmassignee" and value in names:
+                    names.remove(value)
+                task[3] = ", ".join(names)
+            updated[row_num] = task
+        col_letter, col_idx = ("C", 2) if operation == "status" else ("D", 3)
+        sheets_service.spreadsheets().values().batchUpdate(
+            spreadsheetId=current_tenant().spreadsheet_id,
+            body={
+                "valueInputOption": "USER_ENTERED",
+                "data": [{"range": f"Tasks!{col_letter}{row_num}", "values": [[task[col_idx]]]}
+                         for row_num, task in updated.items()]
+            }
+        ).execute()
+        for row_num, task in updated.items():
+            record_task_write(row_num, task)
+            tasks[row_num] = task
+        summary = {
+            "status": f"set status of {len(selected)} task(s) to '{value}'",
+            "addassignee": f"assigned {value} to {len(selected)} task(s)",
+            "rmassignee": f"removed {value} from {len(selected)} task(s)",
+        }[operation]
+
+    project_name = get_project_name_by_id(flow.project_id)
+    add_notification(f"🔔 @{call.from_user.username} {summary} in project '{project_name}'")
+    if flow.tasks:
+        show_bulk_task_list(call, flow)
+    else:
+        bot.edit_message_text("No tasks left in this project.", chat_id=call.message.chat.id, message_id=call.message.message_id)
+    bot.answer_callback_query(call.id, summary[0].upper() + summary[1:] + ".")
+
+@bot.callback_query_handler(func=lambda call: call.data == "bulkdone")
+@require_auth
+@handle_errors
+def bulk_done_handler(call):
+    flow = take_flow(call.message.chat.id, 'bulk_edit')
+    if flow is None:
+        bot.answer_callback_query(call.id, "Project not found.")
+        return
+    show_project_view(call.message.chat.id, flow.project_id)
+    bot.answer_callback_query(call.id)
 
 # === New Project Editing Flows ===
 
@@ -622,26 +1822,21 @@ def handle_project_edit_notes(call):
         bot.answer_callback_query(call.id, "Invalid callback.")
         return
     project_id = parts[2]
-    state = user_states.setdefault(call.message.chat.id, {})
-    state["action"] = "edit_project_notes"
-    state["edit_project_id"] = project_id
+    user_states.get_or_create(call.message.chat.id).start_flow("edit_project_notes", ProjectFlow(project_id))
     bot.answer_callback_query(call.id, "Enter new project notes:")
-    bot.send_message(call.message.chat.id, "Please enter new project notes:")
+    show_view(call.message.chat.id, "Please enter new project notes:")
 
-@bot.message_handler(func=lambda m: user_states.get(m.chat.id, {}).get("action") == "edit_project_notes")
+@bot.message_handler(func=lambda m: in_flow(m, "edit_project_notes") and not is_menu_or_command(m.text))
 @require_auth
 @handle_errors
 @rate_limit
 def handle_edit_project_notes(m):
-    state = user_states[m.chat.id]
     new_notes = m.text.strip()
-    project_id = state.get("edit_project_id")
-    if not project_id:
-        bot.send_message(m.chat.id, "Project not found.", reply_markup=get_project_tracking_menu())
+    flow = take_flow(m.chat.id, "edit_project_notes")
+    if flow is None:
+        show_view(m.chat.id, "Project not found.")
         return
-    update_project_field(m.chat.id, project_id, "F", new_notes, "Project notes updated.", m.from_user.username)
-    state.pop("action", None)
-    state.pop("edit_project_id", None)
+    update_project_field(m.chat.id, flow.project_id, "F", new_notes, "Project notes updated.", m.from_user.username)
 
 # B. Change Project Priority
 @bot.callback_query_handler(func=lambda call: call.data.startswith("proj_editpriority_"))
@@ -653,9 +1848,7 @@ def handle_project_edit_priority(call):
         bot.answer_callback_query(call.id, "Invalid callback.")
         return
     project_id = parts[2]
-    state = user_states.setdefault(call.message.chat.id, {})
-    state["action"] = "edit_project_priority"
-    state["edit_project_id"] = project_id
+    user_states.get_or_create(call.message.chat.id).start_flow("edit_project_priority", ProjectFlow(project_id))
     keyboard = types.InlineKeyboardMarkup(row_width=2)
     keyboard.add(
         types.InlineKeyboardButton("High 🔴", callback_data="priority_High"),
@@ -668,19 +1861,16 @@ def handle_project_edit_priority(call):
     bot.edit_message_text("Select new project priority:", chat_id=call.message.chat.id, message_id=call.message.message_id, reply_markup=keyboard)
     bot.answer_callback_query(call.id)
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith("priority_") and user_states.get(call.message.chat.id, {}).get("action") == "edit_project_priority")
+@bot.callback_query_handler(func=lambda call: call.data.startswith("priority_") and in_flow(call, "edit_project_priority"))
 @require_auth
 @handle_errors
 def priority_selection_handler(call):
     new_priority = call.data.split("priority_")[1]
-    state = user_states[call.message.chat.id]
-    project_id = state.get("edit_project_id")
-    if not project_id:
+    flow = take_flow(call.message.chat.id, "edit_project_priority")
+    if flow is None:
         bot.answer_callback_query(call.id, "Project not found.")
         return
-    update_project_field(call.message.chat.id, project_id, "D", new_priority, "Project priority updated.", call.from_user.username)
-    state.pop("action", None)
-    state.pop("edit_project_id", None)
+    update_project_field(call.message.chat.id, flow.project_id, "D", new_priority, "Project priority updated.", call.from_user.username)
     bot.answer_callback_query(call.id)
 
 # C. Change Project Status
@@ -693,9 +1883,7 @@ def handle_project_edit_status(call):
         bot.answer_callback_query(call.id, "Invalid callback.")
         return
     project_id = parts[2]
-    state = user_states.setdefault(call.message.chat.id, {})
-    state["action"] = "edit_project_status"
-    state["edit_project_id"] = project_id
+    user_states.get_or_create(call.message.chat.id).start_flow("edit_project_status", ProjectFlow(project_id))
     keyboard = types.InlineKeyboardMarkup(row_width=2)
     keyboard.add(
         types.InlineKeyboardButton("Not Started", callback_data="status_Not Started"),
@@ -708,19 +1896,16 @@ def handle_project_edit_status(call):
     bot.edit_message_text("Select new project status:", chat_id=call.message.chat.id, message_id=call.message.message_id, reply_markup=keyboard)
     bot.answer_callback_query(call.id)
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith("status_") and user_states.get(call.message.chat.id, {}).get("action") == "edit_project_status")
+@bot.callback_query_handler(func=lambda call: call.data.startswith("status_") and in_flow(call, "edit_project_status"))
 @require_auth
 @handle_errors
 def status_selection_handler(call):
     new_status = call.data.split("status_")[1]
-    state = user_states[call.message.chat.id]
-    project_id = state.get("edit_project_id")
-    if not project_id:
+    flow = take_flow(call.message.chat.id, "edit_project_status")
+    if flow is None:
         bot.answer_callback_query(call.id, "Project not found.")
         return
-    update_project_field(call.message.chat.id, project_id, "E", new_status, "Project status updated.", call.from_user.username)
-    state.pop("action", None)
-    state.pop("edit_project_id", None)
+    update_project_field(call.message.chat.id, flow.project_id, "E", new_status, "Project status updated.", call.from_user.username)
     bot.answer_callback_query(call.id)
 
 # D. Change Project Assignee
@@ -733,34 +1918,29 @@ def handle_project_edit_assignee(call):
         bot.answer_callback_query(call.id, "Invalid callback.")
         return
     project_id = parts[2]
-    state = user_states.setdefault(call.message.chat.id, {})
-    state["action"] = "edit_project_assignee"
-    state["edit_project_id"] = project_id
+    user_states.get_or_create(call.message.chat.id).start_flow("edit_project_assignee", ProjectFlow(project_id))
     keyboard = types.InlineKeyboardMarkup(row_width=2)
-    for name in available_assignees:
+    for name in current_tenant().access_config.assignees:
         keyboard.add(types.InlineKeyboardButton(name, callback_data=f"select_assignee_{name}"))
     bot.edit_message_text("Select new project assignee:", chat_id=call.message.chat.id, message_id=call.message.message_id, reply_markup=keyboard)
     bot.answer_callback_query(call.id)
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith("select_assignee_") and user_states.get(call.message.chat.id, {}).get("action") == "edit_project_assignee")
+@bot.callback_query_handler(func=lambda call: call.data.startswith("select_assignee_") and in_flow(call, "edit_project_assignee"))
 @require_auth
 @handle_errors
 def select_assignee_handler(call):
     new_assignee = call.data.split("select_assignee_")[1]
-    state = user_states[call.message.chat.id]
-    project_id = state.get("edit_project_id")
-    if not project_id:
+    flow = take_flow(call.message.chat.id, "edit_project_assignee")
+    if flow is None:
         bot.answer_callback_query(call.id, "Project not found.")
         return
-    update_project_field(call.message.chat.id, project_id, "C", new_assignee, "Project assignee updated.", call.from_user.username)
-    state.pop("action", None)
-    state.pop("edit_project_id", None)
+    update_project_field(call.message.chat.id, flow.project_id, "C", new_assignee, "Project assignee updated.", call.from_user.username)
     bot.answer_callback_query(call.id)
 
 def update_project_field(chat_id, project_id, col_letter, new_value, success_msg, username):
     try:
         result = sheets_service.spreadsheets().values().get(
-            spreadsheetId=SPREADSHEET_ID,
+            spreadsheetId=current_tenant().spreadsheet_id,
             range="Projects!A2:A1000" # Only need column A to find the row
         ).execute()
         rows = result.get("values", [])
@@ -771,18 +1951,19 @@ def update_project_field(chat_id, project_id, col_letter, new_value, success_msg
                 break
         
         if not row_number:
-            bot.send_message(chat_id, "Project ID not found.", reply_markup=get_project_tracking_menu())
+            show_view(chat_id, "Project ID not found.")
             return
             
         update_range = f"Projects!{col_letter}{row_number}"
         body = {"values": [[new_value]]}
         sheets_service.spreadsheets().values().update(
-            spreadsheetId=SPREADSHEET_ID,
+            spreadsheetId=current_tenant().spreadsheet_id,
             range=update_range,
             valueInputOption="USER_ENTERED", # Changed to USER_ENTERED
             body=body
         ).execute()
-        bot.send_message(chat_id, success_msg, reply_markup=get_project_tracking_menu())
+        record_project_field(project_id, col_letter, new_value)
+        show_project_view(chat_id, project_id, f"✅ {success_msg}")
 
         # Add notification
         project_name = get_project_name_by_id(project_id) # Get name *after* potential update if col is B
@@ -797,7 +1978,178 @@ def update_project_field(chat_id, project_id, col_letter, new_value, success_msg
         add_notification(f"🔔 @{username} changed {field_name} of project '{project_name}' to '{new_value}'")
 
     except Exception as e:
-        bot.send_message(chat_id, f"Error updating project: {str(e)}", reply_markup=get_project_tracking_menu())
+        show_view(chat_id, f"Error updating project: {str(e)}")
+
+# === Inline Query Mode ===
+def search_snapshot(query):
+    """Match projects and tasks in the local snapshot; an empty query lists projects."""
+    tenant = current_tenant()
+    snapshot = tenant.snapshot
+    results = []
+    with tenant.snapshot_lock:
+        projects = snapshot['projects']
+        for pid, row in projects.items():
+            name = row[1] if len(row) > 1 else ""
+            if query in name.lower():
+                row = row + [""] * (6 - len(row))
+                text = (f"Project: {row[1]}\nAssignee: {row[2] or 'Not assigned'}\nPriority: {row[3] or 'Not set'}\n"
+                        f"Status: {row[4] or 'Unknown'}\nOpen tasks: {tenant.open_task_counts.get(pid, 0)}")
+                results.append(types.InlineQueryResultArticle(
+                    id=f"p:{pid}",
+                    title=f"{get_priority_icon(row[3])} {row[1]}",
+                    description=f"{row[4] or 'Unknown'} · {row[2] or 'Not assigned'}",
+                    input_message_content=types.InputTextMessageContent(text)
+                ))
+                if len(results) >= INLINE_MAX_RESULTS:
+                    return results
+        if not query:
+            return results
+        for row_num, task in snapshot['tasks'].items():
+            desc = task[1] if len(task) > 1 else ""
+            if query in desc.lower():
+                project = projects.get(task[0])
+                project_name = project[1] if project and len(project) > 1 else f"Project ID {task[0]}"
+                assignees = ", ".join(get_task_assignees(task))
+                text = f"Task: {desc}\nProject: {project_name}\nStatus: {get_task_status(task)}\nAssignee: {assignees}"
+                if len(task) > 4 and task[4].strip():
+                    text += f"\nNotes: {task[4]}"
+                results.append(types.InlineQueryResultArticle(
+                    id=f"t:{row_num}",
+                    title=desc,
+                    description=f"{project_name} · {get_task_status(task)} · {assignees}",
+                    input_message_content=types.InputTextMessageContent(text)
+                ))
+                if len(results) >= INLINE_MAX_RESULTS:
+                    break
+    return results
+
+def get_inline_results(query):
+    query = " ".join(query.lower().split())
+    tenant = current_tenant()
+    inline_cache = tenant.inline_cache
+    version = tenant.snapshot['version']
+    with tenant.inline_cache_lock:
+        cached = inline_cache.get(query)
+        if cached and cached[0] == version:
+            inline_cache.move_to_end(query)
+            return cached[1]
+    results = search_snapshot(query)
+    with tenant.inline_cache_lock:
+        inline_cache[query] = (version, results)
+        inline_cache.move_to_end(query)
+        while len(inline_cache) > INLINE_CACHE_SIZE:
+            inline_cache.popitem(last=False)
+    return results
+
+@bot.inline_handler(func=lambda query: True)
+@require_auth
+@handle_errors
+def handle_inline_query(query):
+    # is_personal keeps Telegram from serving one user's cached answer to an unauthorized user
+    bot.answer_inline_query(query.id, get_inline_results(query.query), cache_time=INLINE_CACHE_SECONDS, is_personal=True)
+
+# === Summary Dashboard ===
+@bot.message_handler(commands=["summary"])
+@require_auth
+@handle_errors
+@rate_limit
+def handle_summary(message):
+    bot.send_message(message.chat.id, build_summary_text(), parse_mode="HTML")
+
+@bot.message_handler(commands=["mine"])
+@require_auth
+@handle_errors
+@rate_limit
+def handle_mine(message):
+    # "/mine Denys" picks an assignee explicitly; otherwise match the sender's first name
+    parts = message.text.split(maxsplit=1)
+    assignee = parts[1].strip() if len(parts) > 1 else message.from_user.first_name
+    if assignee in current_tenant().access_config.assignees:
+        bot.send_message(message.chat.id, build_assignee_summary_text(assignee), parse_mode="HTML")
+        return
+    keyboard = types.InlineKeyboardMarkup(row_width=2)
+    for name in current_tenant().access_config.assignees:
+        keyboard.add(types.InlineKeyboardButton(name, callback_data=f"mine_{name}"))
+    bot.send_message(message.chat.id, "Select an assignee:", reply_markup=keyboard)
+
+@bot.callback_query_handler(func=lambda call: call.data.startswith("mine_"))
+@require_auth
+@handle_errors
+def handle_mine_select(call):
+    assignee = call.data.split("mine_", 1)[1]
+    bot.edit_message_text(build_assignee_summary_text(assignee), chat_id=call.message.chat.id,
+                          message_id=call.message.message_id, parse_mode="HTML")
+    bot.answer_callback_query(call.id)
+
+@bot.message_handler(commands=["sync"])
+@require_auth
+@handle_errors
+@rate_limit
+def handle_sync(message):
+    sync_snapshot()
+    bot.send_message(message.chat.id, "Snapshot refreshed from Google Sheets.")
+
+# === CSV Export ===
+def get_sheet_row_count(sheet):
+    """Number of rows in a tab's grid (including blank ones), or None if the API does not report it."""
+    result = sheets_service.spreadsheets().get(
+        spreadsheetId=current_tenant().spreadsheet_id,
+        fields="sheets.properties(title,gridProperties.rowCount)"
+    ).execute()
+    for tab in result.get("sheets", []):
+        if tab["properties"]["title"] == sheet:
+            return tab["properties"].get("gridProperties", {}).get("rowCount")
+    return None
+
+def iter_sheet_rows(sheet, last_col):
+    """Yield sheet rows chunk by chunk instead of loading the whole tab at once."""
+    # Sheets drops trailing blank rows from each chunk, so a short chunk does not mean
+    # the end of the tab; read up to the grid's row count instead.
+    row_count = get_sheet_row_count(sheet)
+    start = 2
+    while row_count is None or start <= row_count:
+        result = sheets_service.spreadsheets().values().get(
+            spreadsheetId=current_tenant().spreadsheet_id,
+            range=f"{sheet}!A{start}:{last_col}{start + EXPORT_CHUNK_ROWS - 1}"
+        ).execute()
+        rows = result.get("values", [])
+        yield from rows
+        if row_count is None and not rows:
+            return
+        start += EXPORT_CHUNK_ROWS
+
+def iter_export_rows():
+    yield ["Type", "Project ID", "Project", "Description", "Status", "Assignee", "Priority", "Notes"]
+    project_names = {}
+    for row in iter_sheet_rows("Projects", "F"):
+        if not row or not row[0]:
+            continue
+        row = row + [""] * (6 - len(row))
+        project_names[row[0]] = row[1]
+        yield ["Project", row[0], row[1], "", row[4], row[2], row[3], row[5]]
+    for row in iter_sheet_rows("Tasks", "E"):
+        if not row or not row[0]:
+            continue
+        row = row + [""] * (5 - len(row))
+        yield ["Task", row[0], project_names.get(row[0], ""), row[1], row[2], row[3], "", row[4]]
+
+@bot.message_handler(commands=["export"])
+@require_auth
+@handle_errors
+@rate_limit
+def handle_export(message):
+    bot.send_chat_action(message.chat.id, "upload_document")
+    # Rows are written to a temp file as they arrive, so the CSV is never held in memory
+    with tempfile.TemporaryFile() as tmp:
+        text = io.TextIOWrapper(tmp, encoding="utf-8", newline="")
+        writer = csv.writer(text)
+        for row in iter_export_rows():
+            writer.writerow(row)
+        text.flush()
+        tmp.seek(0)
+        filename = f"projects_{datetime.now().strftime('%Y%m%d_%H%M')}.csv"
+        bot.send_document(message.chat.id, tmp, visible_file_name=filename)
+        text.detach()
 
 # === Section Selection Handlers ===
 @bot.message_handler(func=lambda message: message.text == "Project Tracking")
@@ -805,9 +2157,7 @@ def update_project_field(chat_id, project_id, col_letter, new_value, success_msg
 @handle_errors
 @rate_limit
 def handle_project_tracking(message):
-    if message.chat.id not in user_states:
-        user_states[message.chat.id] = {}
-    user_states[message.chat.id]['section'] = 'project'
+    user_states.get_or_create(message.chat.id).section = 'project'
     bot.send_message(message.chat.id, "Welcome to Project Tracking!", reply_markup=get_project_tracking_menu())
 
 @bot.message_handler(func=lambda message: message.text == "Back to Main")
@@ -815,8 +2165,9 @@ def handle_project_tracking(message):
 @handle_errors
 @rate_limit
 def back_to_main(message):
-    if message.chat.id in user_states:
-        user_states[message.chat.id]['section'] = None
+    session = user_states.get(message.chat.id)
+    if session:
+        session.section = None
     bot.send_message(message.chat.id, "Returning to main menu.", reply_markup=get_initial_menu())
 
 # === /start Command ===
@@ -828,25 +2179,30 @@ def handle_start(message):
     # Check auth *after* potentially adding user state
     user = message.from_user
     chat_id = message.chat.id
-    if not user.username or user.username not in AUTHORIZED_USERNAMES:
+    tenant = resolve_tenant(chat_id, user.username) if user.username else None
+    if not tenant or user.username not in tenant.access_config.authorized_usernames:
         username_str = f" (@{user.username})" if user.username else ""
         bot.send_message(chat_id, f"Sorry, user {user.first_name}{username_str} (ID: {user.id}) is not authorized.")
-        active_chat_ids.discard(chat_id) # Remove from active list if unauthorized
+        for other in tenants.values():
+            other.active_chat_ids.discard(chat_id) # Remove from active lists if unauthorized
         return
-        
-    # Add authorized user's chat_id to the active set for notifications
-    active_chat_ids.add(chat_id)
-    print(f"User @{user.username} started. Active chats: {active_chat_ids}") # Debugging
-        
-    user_states[chat_id] = {
-        "section": "project",  # Set section to project immediately
-        "action": None
-    }
-    welcome_text = "Welcome to Project Tracking Bot! This bot helps you manage your projects and tasks in Google Sheets."
-    bot.send_message(chat_id, welcome_text, reply_markup=get_project_tracking_menu())
-    
-    # Automatically show the list of projects after starting
-    list_projects(chat_id)
+
+    with use_tenant(tenant):
+        # Add authorized user's chat_id to their team's active set for notifications
+        for other in tenants.values():
+            other.active_chat_ids.discard(chat_id)
+        tenant.active_chat_ids.add(chat_id)
+        note_user_activity(message)
+        print(f"User @{user.username} started in {tenant.id}. Active chats: {tenant.active_chat_ids}") # Debugging
+
+        session = user_states.get_or_create(chat_id)
+        session.section = "project"  # Set section to project immediately
+        session.end_flow()
+        welcome_text = "Welcome to Project Tracking Bot! This bot helps you manage your projects and tasks in Google Sheets."
+        bot.send_message(chat_id, welcome_text, reply_markup=get_project_tracking_menu())
+
+        # Automatically show the list of projects after starting
+        list_projects(chat_id)
 
 # === Notification Service ===
 def start_notification_service():
@@ -854,18 +2210,20 @@ def start_notification_service():
     def notification_worker():
         while True:
             if notification_queue:
-                notification = notification_queue.pop(0)
+                tenant_id, notification = notification_queue.pop(0)
+                tenant = tenants.get(tenant_id)
                 # Create a copy of the set to avoid issues if it changes during iteration
-                current_active_chats = active_chat_ids.copy()
+                current_active_chats = tenant.active_chat_ids.copy() if tenant else set()
                 print(f"Sending notification to {len(current_active_chats)} chats: {notification}") # Debugging
                 for chat_id in current_active_chats:
                     try:
                         bot.send_message(chat_id, notification)
+                        bury_live_message(chat_id)
                     except Exception as e:
                         print(f"Error sending notification to chat {chat_id}: {str(e)}")
                         # Optional: Remove chat_id if sending failed persistently
                         # if 'bot was blocked' in str(e) or 'user deactivated' in str(e):
-                        #    active_chat_ids.discard(chat_id)
+                        #    tenant.active_chat_ids.discard(chat_id)
             time.sleep(2)  # Check every 2 seconds
     
     global notification_thread
@@ -875,16 +2233,246 @@ def start_notification_service():
         print("Notification service started.")
 
 def add_notification(message):
-    """Add a notification to the queue."""
+    """Add a notification for the current tenant's chats to the queue."""
     print(f"Adding notification: {message}") # Debugging
-    notification_queue.append(message)
+    notification_queue.append((current_tenant().id, message))
+
+# === Scheduler (reminders, digests, deferred jobs) ===
+# One thread sleeps until the earliest job in a heap is due. Cancelled or rescheduled
+# jobs leave stale heap entries behind, which are skipped when they reach the top.
+SCHEDULE_FLUSH_SECONDS = 10
+MIN_DIGEST_HOURS = 1              # shortest allowed /digest interval
+MAX_DIGEST_HOURS = 24 * 30
+MAX_REMIND_MINUTES = 60 * 24 * 365
+scheduler_cond = threading.Condition()
+scheduled_jobs = {}   # job ID -> {'id', 'kind', 'run_at', 'interval', 'payload'}; payload['tenant'] is the owning tenant
+scheduler_heap = []   # (run_at, sequence, job ID)
+scheduler_seq = 0
+scheduler_dirty = False
+scheduler_thread = None
+schedule_file_lock = threading.Lock()
+
+def schedule_job(job_id, kind, run_at, payload=None, interval=None, replace=True):
+    """Schedule a job at epoch time run_at; recurring jobs repeat every `interval` seconds.
+
+    The job runs as the current tenant unless the payload already names one.
+    """
+    global scheduler_seq, scheduler_dirty
+    payload = dict(payload or {})
+    payload.setdefault('tenant', current_tenant().id)
+    with scheduler_cond:
+        if job_id in scheduled_jobs and not replace:
+            return False
+        scheduled_jobs[job_id] = {'id': job_id, 'kind': kind, 'run_at': run_at, 'interval': interval, 'payload': payload}
+        scheduler_seq += 1
+        heapq.heappush(scheduler_heap, (run_at, scheduler_seq, job_id))
+        scheduler_dirty = True
+        scheduler_cond.notify()
+    return True
+
+def cancel_job(job_id):
+    global scheduler_dirty
+    with scheduler_cond:
+        if scheduled_jobs.pop(job_id, None) is None:
+            return False
+        scheduler_dirty = True
+    return True
+
+def pop_due_jobs(now):
+    """Pop every due job, rescheduling recurring ones. Caller holds scheduler_cond."""
+    global scheduler_seq, scheduler_dirty
+    due = []
+    while scheduler_heap and scheduler_heap[0][0] <= now:
+        run_at, _, job_id = heapq.heappop(scheduler_heap)
+        job = scheduled_jobs.get(job_id)
+        if job is None or job['run_at'] != run_at:
+            continue  # cancelled or rescheduled
+        due.append(dict(job))
+        if job['interval']:
+            job['run_at'] = run_at + job['interval']
+            if job['run_at'] <= now:
+                job['run_at'] = now + job['interval']  # skip missed runs instead of firing them all after downtime
+            scheduler_seq += 1
+            heapq.heappush(scheduler_heap, (job['run_at'], scheduler_seq, job_id))
+        else:
+            del scheduled_jobs[job_id]
+        scheduler_dirty = True
+    return due
+
+def save_schedule():
+    global scheduler_dirty
+    # Held across copy and write so a slower, older copy can never overwrite a newer file
+    with schedule_file_lock:
+        with scheduler_cond:
+            if not scheduler_dirty:
+                return
+            jobs = [dict(job) for job in scheduled_jobs.values()]
+            scheduler_dirty = False
+        tmp_path = SCHEDULE_FILE + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"jobs": jobs}, f)
+        os.replace(tmp_path, SCHEDULE_FILE)
+
+def flush_schedule():
+    """Persist now; used after user-created jobs so a confirmed reminder survives a restart."""
+    try:
+        save_schedule()
+    except OSError as e:
+        print(f"Error saving schedule: {e}")
+
+def load_schedule():
+    if not os.path.exists(SCHEDULE_FILE):
+        return
+    try:
+        with open(SCHEDULE_FILE, encoding="utf-8") as f:
+            jobs = json.load(f).get("jobs", [])
+    except (OSError, ValueError) as e:
+        print(f"Error loading schedule: {e}")
+        return
+    loaded = 0
+    for job in jobs:
+        # A NaN or infinite time would sit at the top of the heap and block every other job
+        if not isinstance(job.get('run_at'), (int, float)) or not math.isfinite(job['run_at']):
+            print(f"Skipping scheduled job {job.get('id')} with invalid run time {job.get('run_at')!r}")
+            continue
+        interval = job.get('interval')
+        if interval is not None and not (isinstance(interval, (int, float)) and math.isfinite(interval) and interval > 0):
+            print(f"Skipping scheduled job {job.get('id')} with invalid interval {interval!r}")
+            continue
+        schedule_job(job['id'], job['kind'], job['run_at'], job.get('payload'), interval)
+        loaded += 1
+    print(f"Loaded {loaded} scheduled jobs.")
+
+def run_job(job):
+    handler = JOB_HANDLERS.get(job['kind'])
+    if handler is None:
+        print(f"No handler for scheduled job kind '{job['kind']}'")
+        return
+    tenant = tenants.get(job['payload'].get('tenant'))
+    if tenant is None:
+        print(f"Skipping scheduled job {job['id']}: tenant {job['payload'].get('tenant')} is not configured")
+        return
+    with use_tenant(tenant):
+        try:
+            handler(job)
+        except Exception as e:
+            print(f"Error running scheduled job {job['id']}: {str(e)}")
+
+def start_scheduler_service():
+    """Load the persisted schedule and start the scheduler thread."""
+    def scheduler_worker():
+        last_flush = time.time()
+        while True:
+            with scheduler_cond:
+                now = time.time()
+                due = pop_due_jobs(now)
+                if not due:
+                    wait = scheduler_heap[0][0] - now if scheduler_heap else SCHEDULE_FLUSH_SECONDS
+                    scheduler_cond.wait(min(wait, SCHEDULE_FLUSH_SECONDS))
+            for job in due:
+                run_job(job)
+            if time.time() - last_flush >= SCHEDULE_FLUSH_SECONDS:
+                flush_schedule()
+                last_flush = time.time()
+
+    load_schedule()
+    global scheduler_thread
+    if scheduler_thread is None or not scheduler_thread.is_alive():
+        scheduler_thread = threading.Thread(target=scheduler_worker, daemon=True)
+        scheduler_thread.start()
+        print("Scheduler service started.")
+
+# Stale task reminders
+def schedule_stale_check(task, replace=False):
+    job_id = f"stale:{current_tenant().id}:{task[0]}:{task[1] if len(task) > 1 else ''}"
+    payload = {'project_id': task[0], 'desc': task[1] if len(task) > 1 else ""}
+    schedule_job(job_id, 'stale_check', time.time() + STALE_TASK_DAYS * 86400, payload, replace=replace)
+
+def run_stale_check(job):
+    payload = job['payload']
+    tenant = current_tenant()
+    with tenant.snapshot_lock:
+        task = next((t for t in tenant.snapshot['tasks'].values()
+                     if t[0] == payload['project_id'] and len(t) > 1 and t[1] == payload['desc']), None)
+    if task is None or get_task_status(task) != "In Progress":
+        return
+    project_name = get_project_name_by_id(payload['project_id'])
+    assignees = ", ".join(get_task_assignees(task))
+    add_notification(f"⏰ Task '{payload['desc']}' in project '{project_name}' has been In Progress "
+                     f"for over {STALE_TASK_DAYS} days (assignee: {assignees})")
+    schedule_stale_check(task, replace=True)
+
+# Recurring per-chat digests
+def run_digest(job):
+    bot.send_message(job['payload']['chat_id'], build_summary_text(), parse_mode="HTML")
+
+# Deferred one-off messages
+def run_deferred_message(job):
+    bot.send_message(job['payload']['chat_id'], job['payload']['text'])
+
+JOB_HANDLERS = {
+    'stale_check': run_stale_check,
+    'digest': run_digest,
+    'deferred_message': run_deferred_message,
+}
+
+@bot.message_handler(commands=["digest"])
+@require_auth
+@handle_errors
+@rate_limit
+def handle_digest(message):
+    # /digest <hours> subscribes this chat to a recurring summary, /digest off cancels it
+    parts = message.text.split(maxsplit=1)
+    arg = parts[1].strip().lower() if len(parts) > 1 else ""
+    job_id = f"digest:{message.chat.id}"
+    if arg == "off":
+        cancel_job(job_id)
+        flush_schedule()
+        bot.send_message(message.chat.id, "Status digest turned off.")
+        return
+    try:
+        hours = float(arg) if arg else 24
+    except ValueError:
+        hours = 0
+    if not math.isfinite(hours) or not MIN_DIGEST_HOURS <= hours <= MAX_DIGEST_HOURS:
+        bot.send_message(message.chat.id, f"Usage: /digest <hours> or /digest off "
+                                          f"(between {MIN_DIGEST_HOURS} and {MAX_DIGEST_HOURS} hours)")
+        return
+    schedule_job(job_id, 'digest', time.time() + hours * 3600, {'chat_id': message.chat.id}, interval=hours * 3600)
+    flush_schedule()
+    bot.send_message(message.chat.id, f"Status digest will be sent every {hours:g} hour(s).")
 
-# Helper function to get project name by ID (Consider caching this)
+@bot.message_handler(commands=["remind"])
+@require_auth
+@handle_errors
+@rate_limit
+def handle_remind(message):
+    # /remind <minutes> <text>
+    parts = message.text.split(maxsplit=2)
+    try:
+        minutes = float(parts[1]) if len(parts) == 3 else 0
+    except ValueError:
+        minutes = 0
+    if not math.isfinite(minutes) or not 0 < minutes <= MAX_REMIND_MINUTES:
+        bot.send_message(message.chat.id, f"Usage: /remind <minutes> <text> (at most {MAX_REMIND_MINUTES} minutes)")
+        return
+    job_id = f"remind:{message.chat.id}:{message.message_id}"
+    schedule_job(job_id, 'deferred_message', time.time() + minutes * 60,
+                 {'chat_id': message.chat.id, 'text': f"⏰ Reminder: {parts[2]}"})
+    flush_schedule()
+    bot.send_message(message.chat.id, f"Reminder set for {minutes:g} minute(s) from now.")
+
+# Helper function to get project name by ID (served from the snapshot when possible)
 def get_project_name_by_id(project_id):
+    tenant = current_tenant()
+    with tenant.snapshot_lock:
+        project = tenant.snapshot['projects'].get(project_id)
+    if project and len(project) >= 2:
+        return project[1]
     try:
         # Optimize: Only fetch columns A and B
         result = sheets_service.spreadsheets().values().get(
-            spreadsheetId=SPREADSHEET_ID,
+            spreadsheetId=current_tenant().spreadsheet_id,
             range="Projects!A2:B1000" 
         ).execute()
         rows = result.get("values", [])
@@ -900,6 +2488,14 @@ def get_project_name_by_id(project_id):
 if __name__ == "__main__":
     print("Bot starting...")
     start_notification_service() # Start the notification thread
+    start_config_refresher() # Load authorized users and assignees before handling updates
+    start_session_janitor() # Evict idle sessions and cancel abandoned flows
+    start_scheduler_service() # Restore persisted jobs before the snapshot schedules stale checks
+    start_snapshot_service() # Load the snapshot and keep it fresh
     print("Starting polling...")
-    bot.infinity_polling()
+    signal.signal(signal.SIGTERM, lambda signum, frame: bot.stop_polling()) # Let service managers stop us cleanly
+    try:
+        bot.infinity_polling()
+    finally:
+        flush_schedule() # Persist jobs changed since the last periodic flush
     print("Bot stopped.") # This line might not be reached in normal operation
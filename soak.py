@@ -0,0 +1,393 @@
+"""Concurrent soak test for the bot's conversation flows.
+
+Runs hundreds of virtual users through the add-task, edit-task and project-edit
+flows at the same time. Updates go through the real telebot dispatch and the real
+handlers in main.py; only Google Sheets and the Telegram API are replaced with
+in-memory fakes. Reports throughput and latency, and exits non-zero if a write
+lands in the wrong row, state leaks between chats, or an update gets no response.
+
+Usage:
+    python soak.py --users 300 --iterations 5 --sheets-latency-ms 20
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from types import SimpleNamespace
+
+# main.py reads these at import time; the fakes below never touch the network
+os.environ.setdefault("BOT_TOKEN", "123456:SOAK-TEST")
+os.environ.setdefault("SPREADSHEET_ID", "soak-spreadsheet")
+os.environ.setdefault("SCHEDULE_FILE", os.path.join(tempfile.gettempdir(), "soak_schedule.json"))
+os.environ.setdefault("API_QUOTA_PER_MINUTE", "1000000")  # measure the bot, not the per-team quota
+
+from google.oauth2 import service_account
+import googleapiclient.discovery
+from telebot import types
+
+STATUSES = ["Not Done", "In Progress", "Done"]
+ERROR_PREFIXES = ("⚠️ Unexpected error", "🚨 API Error", "Error ")
+
+
+# === Fake Google Sheets ===
+def col_to_index(col):
+    idx = 0
+    for ch in col:
+        idx = idx * 26 + ord(ch) - ord("A") + 1
+    return idx - 1
+
+def parse_range(a1):
+    sheet, _, cells = a1.partition("!")
+    m = re.fullmatch(r"([A-Z]+)(\d*)(?::([A-Z]+)(\d*))?", cells)
+    col1, row1, col2, row2 = m.groups()
+    return (sheet, col_to_index(col1), int(row1) if row1 else 1,
+            col_to_index(col2 or col1), int(row2) if row2 else (int(row1) if row1 and not col2 else None))
+
+class FakeRequest:
+    def __init__(self, sheets, fn):
+        self.sheets = sheets
+        self.fn = fn
+
+    def execute(self):
+        if self.sheets.latency:
+            time.sleep(self.sheets.latency)
+        with self.sheets.lock:
+            return self.fn()
+
+class FakeSheets:
+    """Enough of the Sheets v4 API for main.py: values get/batchGet/append/update/batchUpdate and row deletes."""
+
+    def __init__(self, latency=0.0):
+        self.tabs = {"Projects": [], "Tasks": []}  # each tab is a list of rows, index 0 is the header row
+        self.sheet_ids = {"Projects": 0, "Tasks": 1}
+        self.lock = threading.Lock()
+        self.latency = latency
+        self.calls = defaultdict(int)
+
+    # Resource chain: service.spreadsheets().values().get(...)
+    def spreadsheets(self):
+        return self
+
+    def values(self):
+        return self
+
+    def read(self, a1):
+        sheet, c1, r1, c2, r2 = parse_range(a1)
+        rows = self.tabs[sheet]
+        last = len(rows) if r2 is None else min(r2, len(rows))
+        out = []
+        for row in rows[r1 - 1:last]:
+            cells = row[c1:c2 + 1]
+            while cells and cells[-1] == "":
+                cells.pop()
+            out.append(cells)
+        while out and not out[-1]:
+            out.pop()
+        return out
+
+    def write(self, a1, values):
+        sheet, c1, r1, _, _ = parse_range(a1)
+        rows = self.tabs[sheet]
+        for offset, values_row in enumerate(values):
+            while len(rows) < r1 + offset:
+                rows.append([])
+            row = rows[r1 + offset - 1]
+            row.extend([""] * (c1 + len(values_row) - len(row)))
+            row[c1:c1 + len(values_row)] = [str(v) for v in values_row]
+
+    def get(self, spreadsheetId, range=None, fields=None, **kwargs):
+        if range is None:
+            self.calls["spreadsheets.get"] += 1
+            return FakeRequest(self, lambda: {"sheets": [
+                {"properties": {"sheetId": sid, "title": title}} for title, sid in self.sheet_ids.items()]})
+        self.calls["values.get"] += 1
+        return FakeRequest(self, lambda: {"range": range, "values": self.read(range)})
+
+    def batchGet(self, spreadsheetId, ranges, **kwargs):
+        self.calls["values.batchGet"] += 1
+        return FakeRequest(self, lambda: {"valueRanges": [{"range": r, "values": self.read(r)} for r in ranges]})
+
+    def append(self, spreadsheetId, range, body, **kwargs):
+        self.calls["values.append"] += 1
+        def run():
+            sheet = range.split("!")[0]
+            rows = self.tabs[sheet]
+            while rows and not any(rows[-1]):
+                rows.pop()
+            start = len(rows) + 1
+            for values_row in body["values"]:
+                rows.append([str(v) for v in values_row])
+            end = len(rows)
+            return {"updates": {"updatedRange": f"{sheet}!A{start}:E{end}", "updatedRows": end - start + 1}}
+        return FakeRequest(self, run)
+
+    def update(self, spreadsheetId, range, body, **kwargs):
+        self.calls["values.update"] += 1
+        return FakeRequest(self, lambda: self.write(range, body["values"]) or {})
+
+    def batchUpdate(self, spreadsheetId, body, **kwargs):
+        if "data" in body:
+            self.calls["values.batchUpdate"] += 1
+            def run_values():
+                for d in body["data"]:
+                    self.write(d["range"], d["values"])
+                return {}
+            return FakeRequest(self, run_values)
+        self.calls["spreadsheets.batchUpdate"] += 1
+        def run():
+            titles = {sid: title for title, sid in self.sheet_ids.items()}
+            for request in body["requests"]:
+                rng = request["deleteDimension"]["range"]
+                del self.tabs[titles[rng["sheetId"]]][rng["startIndex"]:rng["endIndex"]]
+            return {}
+        return FakeRequest(self, run)
+
+
+# === Fake Telegram ===
+class FakeTelegram:
+    """Records every Bot API call per chat and hands out message IDs like Telegram does."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.next_message_id = defaultdict(lambda: 1)
+        self.texts = defaultdict(list)            # chat_id -> every text the bot sent or edited in
+        self.responses = defaultdict(int)         # chat_id -> number of API calls aimed at the chat
+        self.keyboard_message = {}                # chat_id -> ID of the last message carrying inline buttons
+        self.callback_chats = {}                  # callback query ID -> chat_id
+        self.calls = defaultdict(int)
+
+    def new_message_id(self, chat_id):
+        with self.lock:
+            message_id = self.next_message_id[chat_id]
+            self.next_message_id[chat_id] += 1
+            return message_id
+
+    def record(self, method, chat_id, text=None, message_id=None, reply_markup=None):
+        with self.lock:
+            self.calls[method] += 1
+            self.responses[chat_id] += 1
+            if text is not None:
+                self.texts[chat_id].append(text)
+            if message_id is not None and isinstance(reply_markup, types.InlineKeyboardMarkup):
+                self.keyboard_message[chat_id] = message_id
+
+    def install(self, bot):
+        def send_message(chat_id, text, parse_mode=None, reply_markup=None, **kwargs):
+            message_id = self.new_message_id(chat_id)
+            self.record("send_message", chat_id, text, message_id, reply_markup)
+            return SimpleNamespace(message_id=message_id, chat=SimpleNamespace(id=chat_id))
+
+        def edit_message_text(text, chat_id=None, message_id=None, parse_mode=None, reply_markup=None, **kwargs):
+            self.record("edit_message_text", chat_id, text, message_id, reply_markup)
+            return True
+
+        def edit_message_reply_markup(chat_id=None, message_id=None, reply_markup=None, **kwargs):
+            self.record("edit_message_reply_markup", chat_id, None, message_id, reply_markup)
+            return True
+
+        def answer_callback_query(callback_query_id, text=None, **kwargs):
+            self.record("answer_callback_query", self.callback_chats.get(callback_query_id), text)
+            return True
+
+        def send_chat_action(chat_id, action, **kwargs):
+            self.record("send_chat_action", chat_id)
+            return True
+
+        for fn in (send_message, edit_message_text, edit_message_reply_markup, answer_callback_query, send_chat_action):
+            setattr(bot, fn.__name__, fn)
+
+
+# === Virtual Users ===
+class Harness:
+    def __init__(self, main, sheets, telegram, users, iterations, seed):
+        self.main = main
+        self.sheets = sheets
+        self.telegram = telegram
+        self.users = users
+        self.iterations = iterations
+        self.random = random.Random(seed)
+        self.update_id = 0
+        self.id_lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.failures = []
+        self.expected = {}  # user index -> what the sheet must contain for that user when the run ends
+
+    def next_update_id(self):
+        with self.id_lock:
+            self.update_id += 1
+            return self.update_id
+
+    def seed_sheet(self):
+        self.sheets.tabs["Projects"] = [["ID", "Name", "Assignee", "Priority", "Status", "Notes"]]
+        self.sheets.tabs["Tasks"] = [["Project ID", "Description", "Status", "Assignee", "Notes"]]
+        for n in range(self.users):
+            self.sheets.tabs["Projects"].append([f"P{n}", f"Project vu{n}-", "", "Low", "In Progress", ""])
+            self.sheets.tabs["Tasks"].append([f"P{n}", f"vu{n}-seed", "Not Done", "", ""])
+            self.expected[n] = {"row": n + 2, "edited": f"vu{n}-seed", "added": [], "notes": "", "priority": "Low"}
+
+    def user_json(self, n):
+        return {"id": 100000 + n, "is_bot": False, "first_name": f"User{n}", "username": f"soak_vu{n}"}
+
+    def send(self, n, label, text=None, data=None):
+        """Push one update through telebot's dispatch and record how long the handler took."""
+        chat_id = 100000 + n
+        chat = {"id": chat_id, "type": "private"}
+        if data is None:
+            payload = {"message": {"message_id": self.telegram.new_message_id(chat_id), "from": self.user_json(n),
+                                   "chat": chat, "date": int(time.time()), "text": text}}
+        else:
+            callback_id = f"{chat_id}-{self.next_update_id()}"
+            self.telegram.callback_chats[callback_id] = chat_id
+            message_id = self.telegram.keyboard_message.get(chat_id, 1)
+            payload = {"callback_query": {"id": callback_id, "from": self.user_json(n), "chat_instance": str(chat_id),
+                                          "data": data, "message": {"message_id": message_id, "chat": chat,
+                                                                    "date": int(time.time()), "text": ""}}}
+        payload["update_id"] = self.next_update_id()
+        before = self.telegram.responses[chat_id]
+        start = time.perf_counter()
+        self.main.bot.process_new_updates([types.Update.de_json(payload)])
+        self.latencies[label].append(time.perf_counter() - start)
+        if self.telegram.responses[chat_id] == before:
+            self.failures.append(f"vu{n}: update '{label}' got no response (lost update)")
+
+    def flow_add_task(self, n, k):
+        desc = f"vu{n}-add{k}"
+        status = self.random.choice(STATUSES)
+        assignee = self.random.choice(self.main.current_tenant().access_config.assignees)
+        self.send(n, "add:start", data=f"projadd_P{n}")
+        self.send(n, "add:description", text=desc)
+        self.send(n, "add:status", data=f"task_status_{status}")
+        self.send(n, "add:assignee", data=f"toggle_assignee_{assignee}")
+        self.send(n, "add:confirm", data="assignee_confirm")
+        self.send(n, "add:notes", text=f"vu{n}-note{k}")
+        self.expected[n]["added"].append([f"P{n}", desc, status, assignee, f"vu{n}-note{k}"])
+
+    def flow_edit_task(self, n, k):
+        desc = f"vu{n}-edit{k}"
+        row = self.expected[n]["row"]
+        self.send(n, "edit:list", data=f"projedit_P{n}")
+        self.send(n, "edit:start", data=f"edittask_P{n}_{row}")
+        self.send(n, "edit:description", text=desc)
+        self.send(n, "edit:status", data="edit_task_status_Done")
+        self.send(n, "edit:confirm", data="assignee_confirm")
+        self.send(n, "edit:notes", data="edit_notes_none")
+        self.expected[n]["edited"] = desc
+
+    def flow_project_edit(self, n, k):
+        notes = f"vu{n}-projnote{k}"
+        priority = self.random.choice(["High", "Medium", "Low"])
+        self.send(n, "project:notes_start", data=f"proj_editnotes_P{n}")
+        self.send(n, "project:notes", text=notes)
+        self.send(n, "project:priority_start", data=f"proj_editpriority_P{n}")
+        self.send(n, "project:priority", data=f"priority_{priority}")
+        self.expected[n]["notes"] = notes
+        self.expected[n]["priority"] = priority
+
+    def run_user(self, n, flows):
+        try:
+            for k, flow in enumerate(flows):
+                flow(n, k)
+                session = self.main.user_states.peek(100000 + n)
+                if session is not None and session.action:
+                    self.failures.append(f"vu{n}: flow {flow.__name__} left action '{session.action}' behind")
+        except Exception as e:
+            self.failures.append(f"vu{n}: crashed with {e!r}")
+
+    def run(self):
+        self.seed_sheet()
+        self.main.sync_snapshot()  # as at bot startup, so views redrawn after writes come from the snapshot
+        plans = {n: [self.random.choice([self.flow_add_task, self.flow_edit_task, self.flow_project_edit])
+                     for _ in range(self.iterations)] for n in range(self.users)}
+        threads = [threading.Thread(target=self.run_user, args=(n, plans[n])) for n in range(self.users)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return time.perf_counter() - start
+
+    def verify(self):
+        tasks = self.sheets.tabs["Tasks"]
+        projects = {row[0]: row for row in self.sheets.tabs["Projects"][1:] if row}
+        for n, exp in self.expected.items():
+            row = tasks[exp["row"] - 1]
+            if row[:2] != [f"P{n}", exp["edited"]]:
+                self.failures.append(f"vu{n}: edited row {exp['row']} holds {row[:2]}, expected ['P{n}', '{exp['edited']}']")
+            for added in exp["added"]:
+                matches = [r for r in tasks if r[:2] == added[:2]]
+                if len(matches) != 1 or matches[0][:5] != added:
+                    self.failures.append(f"vu{n}: added task {added[1]} stored as {matches}")
+            project = projects.get(f"P{n}", [])
+            project += [""] * (6 - len(project))
+            if exp["notes"] and (project[5] != exp["notes"] or project[3] != exp["priority"]):
+                self.failures.append(f"vu{n}: project row holds notes={project[5]!r} priority={project[3]!r}, "
+                                     f"expected {exp['notes']!r}/{exp['priority']!r}")
+            # Every text shown in this chat must belong to this user's own project and tasks
+            for text in self.telegram.texts[100000 + n]:
+                if text.startswith(ERROR_PREFIXES):
+                    self.failures.append(f"vu{n}: handler error shown to user: {text}")
+                for other in re.findall(r"vu(\d+)-", text):
+                    if int(other) != n:
+                        self.failures.append(f"vu{n}: saw data of vu{other}: {text[:80]!r}")
+                        break
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else 0.0
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--users", type=int, default=200, help="number of concurrent virtual users")
+    parser.add_argument("--iterations", type=int, default=5, help="flows run by each virtual user")
+    parser.add_argument("--sheets-latency-ms", type=float, default=10, help="simulated latency per Sheets call")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--verbose", action="store_true", help="show the bot's own log output")
+    args = parser.parse_args()
+
+    sheets = FakeSheets(latency=args.sheets_latency_ms / 1000)
+    service_account.Credentials.from_service_account_file = staticmethod(lambda *a, **k: None)
+    googleapiclient.discovery.build = lambda *a, **k: sheets
+    with contextlib.redirect_stdout(sys.stdout if args.verbose else io.StringIO()):
+        import main
+
+    telegram = FakeTelegram()
+    telegram.install(main.bot)
+    main.bot.threaded = False  # run handlers on the virtual users' own threads so timings are per update
+    main.set_access_config([f"soak_vu{n}" for n in range(args.users)], main.DEFAULT_ASSIGNEES)
+    main.notification_queue.clear()
+
+    harness = Harness(main, sheets, telegram, args.users, args.iterations, args.seed)
+    with contextlib.redirect_stdout(sys.stdout if args.verbose else io.StringIO()):
+        elapsed = harness.run()
+    harness.verify()
+
+    updates = sum(len(v) for v in harness.latencies.values())
+    print(f"Virtual users: {args.users}, flows: {args.users * args.iterations}, updates: {updates}")
+    print(f"Elapsed: {elapsed:.2f}s, throughput: {updates / elapsed:.1f} updates/s, "
+          f"{args.users * args.iterations / elapsed:.1f} flows/s")
+    print(f"{'step':<24}{'count':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for label in sorted(harness.latencies):
+        values = harness.latencies[label]
+        print(f"{label:<24}{len(values):>7}" + "".join(
+            f"{percentile(values, p) * 1000:>9.1f}" for p in (50, 95, 99, 100)))
+    print("Sheets calls: " + ", ".join(f"{k}={v}" for k, v in sorted(sheets.calls.items())))
+    print("Telegram calls: " + ", ".join(f"{k}={v}" for k, v in sorted(telegram.calls.items())))
+    if harness.failures:
+        print(f"\nFAILED with {len(harness.failures)} problem(s):")
+        for failure in harness.failures[:50]:
+            print(f"  {failure}")
+        return 1
+    print("\nOK: no misplaced writes, leaked state or lost updates.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())